@@ -21,16 +21,20 @@ yang dibangun dengan jQuery untuk kebutuhan visualisasi data di backend Odoo.
     'depends': [
         'base',
         'web',
+        'bus',
     ],
 
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/shell_dashboard_menu.xml',
         'views/shell_dashboard.xml',
         'views/shell_setting.xml',
         'views/shell_block.xml',
-        'views/shell_menu.xml'
+        'views/shell_menu.xml',
+        'views/shell_index_advice.xml',
+        'views/shell_block_stat.xml'
     ],
 
     'demo': [
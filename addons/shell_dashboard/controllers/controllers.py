@@ -1,6 +1,37 @@
 # -*- coding: utf-8 -*-
 from odoo import http
-from odoo.http import request
+from odoo.http import content_disposition, request
+from odoo.tools import json_default
+from odoo.addons.shell_dashboard.models.shell_block_export import EXPORT_FORMATS
+import gzip
+import json
+
+# Smaller responses are not worth the compression time
+GZIP_MIN_BYTES = 1024
+
+
+def compact_json_response(data):
+    """Minified JSON response, gzipped when the client accepts it"""
+    body = json.dumps(data, default=json_default, separators=(',', ':')).encode('utf-8')
+    headers = [('Content-Type', 'application/json'), ('Vary', 'Accept-Encoding')]
+    if len(body) >= GZIP_MIN_BYTES and 'gzip' in request.httprequest.accept_encodings:
+        body = gzip.compress(body, compresslevel=6)
+        headers.append(('Content-Encoding', 'gzip'))
+    return request.make_response(body, headers=headers)
+
+
+def read_json_params():
+    """JSON object posted as the request body, None when malformed"""
+    try:
+        params = json.loads(request.httprequest.get_data() or '{}')
+    except ValueError:
+        return None
+    return params if isinstance(params, dict) else None
+
+
+def json_error_response(message, status=400):
+    return request.make_json_response({'error': message}, status=status)
+
 
 class ZeeUi(http.Controller):
     """Class to search and filter values in dashboard"""
@@ -21,4 +52,58 @@ class ZeeUi(http.Controller):
             "is_user": user.has_group("shell_dashboard.group_dashboard_user"),
             "is_manager": user.has_group("shell_dashboard.group_dashboard_manager"),
             "is_admin": user.has_group("shell_dashboard.group_dashboard_admin"),
-        }
\ No newline at end of file
+        }
+
+    @http.route('/api/shell_dashboard/layout', type='json', auth='user')
+    def dashboard_layout(self, action_id):
+        """Layout and config of all blocks, without their data"""
+        return request.env['dashboard.block'].get_dashboard_layout(action_id)
+
+    @http.route('/api/shell_dashboard/block_data', type='json', auth='user')
+    def dashboard_block_data(self, block_ids, start_date=None, end_date=None):
+        """Data of a batch of blocks"""
+        return request.env['dashboard.block'].get_blocks_data(block_ids, start_date, end_date)
+
+    # The client sends its CSRF token in the query string, the body being JSON
+    @http.route('/api/shell_dashboard/compact/block_data', type='http', auth='user', methods=['POST'])
+    def dashboard_block_data_compact(self, **kwargs):
+        """Data of a batch of blocks in the columnar format, read-only"""
+        params = read_json_params()
+        if params is None:
+            return json_error_response("The request body must be a JSON object")
+        return compact_json_response(request.env['dashboard.block'].get_blocks_data(
+            params.get('block_ids', []), params.get('start_date'), params.get('end_date'), compact=True
+        ))
+
+    @http.route('/api/shell_dashboard/compact/delta', type='http', auth='user', methods=['POST'])
+    def dashboard_delta_compact(self, **kwargs):
+        """Changed blocks of a dashboard in the columnar format, read-only"""
+        params = read_json_params()
+        if params is None:
+            return json_error_response("The request body must be a JSON object")
+        action_id = params.get('action_id')
+        if not action_id:
+            return json_error_response("Missing action_id")
+        return compact_json_response(request.env['dashboard.block'].get_dashboard_delta(
+            action_id, params.get('tokens'), params.get('start_date'), params.get('end_date'), compact=True
+        ))
+
+    @http.route('/api/shell_dashboard/list_page', type='json', auth='user')
+    def dashboard_list_page(self, block_id, cursor=None, start_date=None, end_date=None):
+        """Next page of a table block, ``cursor`` comes from the previous page"""
+        return request.env['dashboard.block'].get_list_page(block_id, cursor, start_date, end_date)
+
+    @http.route('/api/shell_dashboard/export/<int:block_id>', type='http', auth='user')
+    def dashboard_export(self, block_id, file_format='csv', start_date=None, end_date=None, **kwargs):
+        """Full data of a table or chart block as CSV or XLSX, streamed in chunks"""
+        block = request.env['dashboard.block'].browse(block_id).exists()
+        if not block:
+            raise request.not_found()
+        block._check_export(file_format)
+        return request.make_response(
+            block._stream_export(file_format, start_date or None, end_date or None),
+            headers=[
+                ('Content-Type', EXPORT_FORMATS[file_format]),
+                ('Content-Disposition', content_disposition(block._get_export_filename(file_format))),
+            ],
+        )
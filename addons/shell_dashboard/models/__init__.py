@@ -3,6 +3,16 @@
 from . import shell_setting
 from . import shell_menu
 from . import shell_block
+from . import shell_block_matview
+from . import shell_block_export
+from . import shell_block_snapshot
+from . import shell_block_stat
+from . import shell_index_advice
 from . import shell_query
+from . import shell_cache
+from . import shell_bus
+from . import shell_model_change
+from . import shell_replica
 from . import res_users
+from . import ir_actions
 
@@ -0,0 +1,12 @@
+from odoo import fields, models
+
+
+class IrActionsClient(models.Model):
+    _inherit = "ir.actions.client"
+
+    shell_layout_version = fields.Integer(
+        string="Dashboard Layout Version",
+        default=0,
+        copy=False,
+        help="Bumped on each layout save, to detect concurrent edits of the dashboard grid"
+    )
@@ -1,12 +1,57 @@
 # -*- coding: utf-8 -*-
 from ast import literal_eval
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
 from odoo import api, fields, models
+from odoo.exceptions import AccessError, UserError
 from odoo.osv import expression
+from odoo.tools import SQL, json_default
+from .shell_block_stat import measure, record_sample
+from .shell_cache import DEFAULT_MAX_BYTES, get_block_cache
+from .shell_parallel import DEFAULT_POOL_SIZE, MAX_POOL_SIZE, get_executor, run_bounded
+from .shell_plan import CompiledPlan, compile_plan, discard_plan, get_plan, get_slots, prepare_plan, set_plan
+from .shell_query import DATE_BUCKETS, QueryRefused
+from .shell_replica import get_replica_dsn, mark_replica_down, replica_env
+import base64
+import functools
+import hashlib
+import json
 import logging
+import psycopg2
+import psycopg2.errors
 import random
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Block values only sent by the delta API when the config token changed
+CONFIG_KEYS = ('model_name', 'active', 'grid_position', 'config')
+
+# Assumed cost (ms) of blocks without telemetry yet
+DEFAULT_BLOCK_COSTS = {'tile': 1.0, 'kpi': 1.0, 'list': 50.0, 'graph': 100.0}
+
+# Approximate length in days of each time bucket, finest first
+BUCKET_DAYS = {'hour': 1 / 24, 'day': 1, 'week': 7, 'month': 30, 'quarter': 91, 'year': 365}
+
+# Block fields the stored value is computed from; editing them queues a recompute
+VALUE_FIELDS = ('model_id', 'measured_field_id', 'operation', 'count_mode', 'filter', 'group_by_id')
+
+# Errors after which a block shows its last good value instead of an error
+DEGRADED_ERRORS = (QueryRefused, psycopg2.errors.QueryCanceled)
+
+# Errors of a broken block definition (unknown field in the filter, no access...)
+# after which the stored value is kept, flagged as stale
+DEFINITION_ERRORS = (ValueError, TypeError, AccessError, UserError, psycopg2.Error)
+
+
+@functools.lru_cache(maxsize=1024)
+def _literal_domain(filter_str):
+    """Parsed block filter, shared between calls: callers must not modify it"""
+    return literal_eval(filter_str)
+
+
 class DashboardBlock(models.Model):
     """Class used to create charts and tiles in dashboard"""
     _name = "dashboard.block"
@@ -58,6 +103,24 @@ class DashboardBlock(models.Model):
         domain="[('model_id','=',model_id), ('ttype','not in',['one2many','binary']), ('store', '=', True)]",
         help='Field to group by (for charts and tables)'
     )
+    group_by_ttype = fields.Selection(related='group_by_id.ttype', string="Group by Type")
+    top_n = fields.Integer(
+        string="Top N Groups",
+        default=0,
+        help="Only show the N best groups and fold the rest into an 'Others' group. 0 shows every group."
+    )
+    top_n_desc = fields.Boolean(string="Largest First", default=True,
+                                help="Keep the largest values, otherwise the smallest")
+    date_bucket = fields.Selection([
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+        ('quarter', 'Quarter'),
+        ('year', 'Year'),
+    ], string="Time Bucket", default='month',
+        help="Group date and datetime values by period, in the user timezone. "
+             "Empty periods are shown with 0. Without a bucket each value is its own group.")
     
     # ==== MEASUREMENT CONFIGURATION ====
     operation = fields.Selection(
@@ -73,6 +136,15 @@ class DashboardBlock(models.Model):
         help='Aggregation operation to calculate values'
     )
     
+    count_mode = fields.Selection([
+        ('exact', 'Exact'),
+        ('estimate', 'Planner Estimate'),
+        ('sample', 'Sampled'),
+    ], string="Count Mode", default='exact',
+        help="Exact runs a full COUNT. Planner Estimate uses PostgreSQL statistics and "
+             "Sampled counts a TABLESAMPLE of the table; both are much cheaper on very "
+             "large tables and the tile shows the value as approximate.")
+
     # PERBAIKAN: Tambahkan ondelete='cascade' untuk field yang merujuk ke ir.model.fields
     measured_field_id = fields.Many2one(
         "ir.model.fields", 
@@ -148,19 +220,43 @@ class DashboardBlock(models.Model):
     table_limit = fields.Integer(string="Row Limit", default=10, 
                                help="Maximum number of rows to display")
     show_pagination = fields.Boolean(string="Show Pagination", default=False)
+    list_sort_field_id = fields.Many2one(
+        'ir.model.fields',
+        string="Sort By",
+        domain="[('model_id','=',model_id), ('ttype','in',['integer','float','monetary','date','datetime']), ('store', '=', True)]",
+        ondelete='set null',
+        help="Column the table is sorted and paginated on. Empty sorts by ID."
+    )
+    list_sort_desc = fields.Boolean(string="Descending", default=True)
+    list_total_mode = fields.Selection([
+        ('exact', 'Exact Count'),
+        ('estimate', 'Estimated Count'),
+        ('sample', 'Sampled Count'),
+        ('none', 'No Total'),
+    ], string="Total Rows", default='exact',
+        help="How the total number of rows is computed. Estimated and sampled counts "
+             "avoid a full count on large tables.")
+    
+    # ==== CACHE SETTINGS ====
+    cache_ttl = fields.Integer(
+        string="Cache Duration (s)",
+        default=60,
+        help="Seconds the block data is served from the server cache. 0 disables caching."
+    )
     
     # ==== KPI/TARGET SETTINGS ====
     record_value = fields.Float(
         string='Current Value', 
-        compute='_compute_record_value', 
-        store=True, 
+        readonly=True,
+        copy=False,
         digits=(16, 2),
-        help="Calculated value based on operation and filter"
+        help="Calculated value based on operation and filter, recomputed in the background "
+             "shortly after the block definition changes"
     )
     prev_value = fields.Float(
         string='Previous Value', 
         default=0, 
-        help="Previous period value for comparison"
+        help="Previous period value for comparison, used until the block has snapshot history"
     )
     target_value = fields.Float(
         string='Target Value', 
@@ -173,6 +269,40 @@ class DashboardBlock(models.Model):
         string="Trend Period",
         default='month'
     )
+    snapshot_ids = fields.One2many(
+        'dashboard.block.snapshot',
+        'block_id',
+        string="History",
+        readonly=True
+    )
+    
+    value_stale = fields.Boolean(
+        string="Stale Value",
+        readonly=True,
+        copy=False,
+        help="The last computation timed out, was refused or failed; the previous value is kept"
+    )
+    statement_timeout = fields.Integer(
+        string="Query Timeout (ms)",
+        default=0,
+        help="Cancel the block queries after this many milliseconds. 0 uses the global dashboard timeout."
+    )
+    
+    # ==== TELEMETRY ====
+    latency_p50 = fields.Float(string="Latency p50 (ms)", compute='_compute_latency', digits=(16, 2))
+    latency_p95 = fields.Float(string="Latency p95 (ms)", compute='_compute_latency', digits=(16, 2))
+    stat_calls = fields.Integer(string="Evaluations", compute='_compute_latency')
+    cache_hit_ratio = fields.Float(string="Cache Hits (%)", compute='_compute_latency', digits=(16, 1))
+    
+    # ==== SCHEDULED REFRESH ====
+    refresh_interval = fields.Integer(
+        string="Refresh Interval (min)",
+        default=0,
+        help="Recompute the current value in the background every N minutes. "
+             "0 only recomputes it when the block definition changes."
+    )
+    next_refresh = fields.Datetime(string="Next Refresh", copy=False, index=True)
+    last_refresh = fields.Datetime(string="Last Refresh", readonly=True, copy=False)
     
     # ==== SYSTEM FIELDS ====
     # PERBAIKAN: Tambahkan ondelete='cascade' untuk client_action_id
@@ -190,48 +320,116 @@ class DashboardBlock(models.Model):
     )
     
     # ==== COMPUTED FIELDS ====
-    @api.depends('measured_field_id', 'operation', 'filter', 'model_name', 'group_by_id')
     def _compute_record_value(self):
-        """Compute the aggregated value based on operation and filter"""
+        """Compute and store the aggregated value based on operation and filter
+
+        When a query times out, is refused or fails on a broken definition,
+        the previously stored value is kept and flagged as stale. Called by the refresh cron; edits of
+        the block definition queue the block for it.
+        """
+        previous_values = self._get_stored_record_values()
+        with measure() as fused_sample:
+            fused_values = self._get_fused_values()
+        # The fused query cost is shared by the blocks it evaluated
+        share = len(fused_values) or 1
+        for rec in fused_values:
+            self._record_block_stat(rec, {
+                'wall_time': fused_sample['wall_time'] / share,
+                'sql_time': fused_sample['sql_time'] / share,
+                'query_count': fused_sample['query_count'] / share,
+                'row_count': 1,
+            }, source='compute')
+        now = fields.Datetime.now()
         for rec in self:
-            rec.record_value = 0.0
-            
-            if not rec.model_name:
-                continue
-                
-            try:
-                target_model = self.env[rec.model_name]
-            except KeyError:
-                _logger.warning("Model %s not found for block %s", rec.model_name, rec.name)
-                continue
-            
-            # Prepare domain
-            domain = self._parse_domain(rec.filter) if rec.filter else []
-            
-            # Compute value
-            if rec.operation == 'count':
-                rec.record_value = target_model.search_count(domain)
-            else:
-                if not rec.measured_field_id or rec.measured_field_id.name not in target_model._fields:
-                    continue
-                    
-                field_name = rec.measured_field_id.name
-                aggregate_field = f'{rec.operation}:{field_name}'
-                
-                try:
-                    result = target_model.read_group(
-                        domain,
-                        [aggregate_field],
-                        [],
-                        limit=1
-                    )
-                    
-                    if result and result[0]:
-                        computed_key = f'{rec.operation}_{field_name}'
-                        rec.record_value = result[0].get(computed_key, 0.0)
-                except Exception as e:
-                    _logger.error("Error computing value for block %s: %s", rec.name, e)
-                    rec.record_value = 0.0
+            value, stale = self._get_record_value(rec, fused_values, previous_values)
+            rec._write_refresh_fields({'record_value': value, 'value_stale': stale, 'last_update': now})
+        # Value computes run in the refresh job, not in dashboard reads
+        self._flush_block_stats(force=True)
+
+    def _write_refresh_fields(self, vals):
+        """Write fields maintained by the refresher, without changing ``write_date``
+
+        ``write_date`` is part of the result cache and compiled plan keys:
+        refreshing a value must not expire them.
+        """
+        if not self.ids:
+            return
+        self.flush_recordset(list(vals))
+        self.env.cr.execute(SQL(
+            "UPDATE dashboard_block SET %s WHERE id IN %s",
+            SQL(", ").join(
+                SQL("%s = %s", SQL.identifier(name), self._fields[name].convert_to_column(value, self))
+                for name, value in vals.items()
+            ),
+            tuple(self.ids),
+        ))
+        self.invalidate_recordset(list(vals))
+
+    def _get_record_value(self, rec, fused_values, previous_values):
+        """Return ``(value, stale)`` of one block"""
+        if rec in fused_values:
+            if fused_values[rec] is None:
+                return previous_values.get(rec.id, 0.0), True
+            return fused_values[rec], False
+
+        if not rec.model_name:
+            return 0.0, False
+
+        try:
+            target_model = self.env[rec.model_name]
+        except KeyError:
+            _logger.warning("Model %s not found for block %s", rec.model_name, rec.name)
+            return 0.0, False
+
+        value, stale = 0.0, False
+        try:
+            with measure() as sample:
+                value = self._compute_block_value(rec, target_model)
+        except DEGRADED_ERRORS as e:
+            _logger.warning("Keeping previous value of block %s: %s", rec.name, e)
+            value, stale = previous_values.get(rec.id, 0.0), True
+        except DEFINITION_ERRORS as e:
+            _logger.error("Error computing value for block %s, keeping the previous value: %s", rec.name, e)
+            value, stale = previous_values.get(rec.id, 0.0), True
+        sample['row_count'] = 1
+        self._record_block_stat(rec, sample, source='compute')
+        return value, stale
+
+    def _compute_block_value(self, rec, target_model):
+        """Aggregate of a single block, with the same SQL aggregate as fused blocks
+
+        Runs on the read replica when healthy, under the block timeout and
+        in a savepoint: errors of a broken definition (``DEFINITION_ERRORS``)
+        are raised without aborting the transaction, so the caller keeps
+        the previous value.
+        """
+        # Prepare domain
+        domain = self._parse_domain(rec.filter) if rec.filter else []
+        operation = rec.operation or 'count'
+
+        field_name = rec.measured_field_id.name if rec.measured_field_id else None
+        if operation != 'count' and (not field_name or field_name not in target_model._fields):
+            return 0.0
+
+        # Compute value
+        def compute(read_model):
+            cr = read_model.env.cr
+            with self._statement_timeout(cr, self._get_statement_timeout(rec)), cr.savepoint(flush=False):
+                if operation == 'count' and rec.count_mode != 'exact':
+                    return self._approximate_count(read_model, domain, rec.count_mode)
+                query = read_model._search(domain)
+                cr.execute(query.select(SQL(read_model.get_aggregate_sql(operation, field_name))))
+                return cr.fetchone()[0] or 0.0
+
+        return self._run_on_read_model(target_model, compute)
+
+    def _get_stored_record_values(self):
+        """Values currently stored in the database, by block id"""
+        ids = tuple(block_id for block_id in self.ids if isinstance(block_id, int))
+        if not ids:
+            return {}
+        self.env.cr.execute("SELECT id, record_value FROM dashboard_block WHERE id IN %s", (ids,))
+        return dict(self.env.cr.fetchall())
     
     @api.depends('write_date')
     def _compute_last_update(self):
@@ -246,9 +444,10 @@ class DashboardBlock(models.Model):
             return []
             
         try:
-            domain = literal_eval(filter_str)
+            domain = _literal_domain(filter_str)
             if isinstance(domain, list):
-                # Replace special variables
+                # Copy the cached parse before replacing special variables
+                domain = [tuple(condition) if isinstance(condition, list) else condition for condition in domain]
                 for i, condition in enumerate(domain):
                     if isinstance(condition, (tuple, list)) and len(condition) == 3:
                         field, op, value = condition
@@ -298,6 +497,439 @@ class DashboardBlock(models.Model):
         
         return colors
     
+    # ==== RESULT CACHE ====
+    def _get_block_cache(self):
+        """Return the block cache of the current database"""
+        cache = get_block_cache(self.env.cr.dbname)
+        max_mb = int(self.env['ir.config_parameter'].sudo().get_param(
+            'dashboard.cache_max_mb', DEFAULT_MAX_BYTES // (1024 * 1024)))
+        cache.max_bytes = max_mb * 1024 * 1024
+        return cache
+
+    def _get_cache_key(self, rec, start_date=None, end_date=None):
+        """Cache key of a block result, shared by users seeing the same records"""
+        return (
+            rec.id,
+            rec.write_date and rec.write_date.isoformat(),
+            repr(self._parse_domain(rec.filter)),
+            start_date or None,
+            end_date or None,
+            *self._get_access_fingerprint(rec),
+        )
+
+    def _get_access_fingerprint(self, rec):
+        """What makes the result of ``rec`` differ between users
+
+        Users with the same companies, language and timezone, the same
+        access and effective record rules on the block model, and the same
+        access to the listed columns get the same result. Blocks filtered
+        on ``%UID`` stay per user.
+        """
+        model = self.env[rec.model_name] if rec.model_name in self.env else None
+        fields_access = ()
+        if model is not None and rec.type == 'list':
+            fields_access = tuple(
+                (field.name, self.env.user.has_groups(model._fields[field.name].groups))
+                for field in rec.tag_fields_ids
+                if field.name in model._fields and model._fields[field.name].groups
+            )
+        return (
+            self.env.uid if rec.filter and '%UID' in rec.filter else None,
+            tuple(self.env.companies.ids),
+            self.env.lang,
+            self.env.context.get('tz') or self.env.user.tz or 'UTC',
+            model is not None and self.env['ir.model.access'].check(model._name, 'read', raise_exception=False),
+            model is not None and self._get_rule_fingerprint(model),
+            fields_access,
+        )
+
+    def _get_cached_block_data(self, blocks, start_date=None, end_date=None):
+        """Return ``{block_id: data}`` for the blocks found in the cache"""
+        cache = self._get_block_cache()
+        cached = {}
+        for rec in blocks:
+            if rec.cache_ttl <= 0:
+                continue
+            data = cache.get(self._get_cache_key(rec, start_date, end_date))
+            if data is not None:
+                cached[rec.id] = data
+        return cached
+
+    def _set_cached_block_data(self, rec, data, start_date=None, end_date=None):
+        """Store a successfully computed block result in the cache
+
+        Blocks without a TTL are stored too, as stale fallback only.
+        """
+        if not isinstance(data, dict) or data.get('error'):
+            return
+        self._get_block_cache().set(
+            self._get_cache_key(rec, start_date, end_date),
+            data,
+            rec.cache_ttl,
+            rec.model_name,
+        )
+
+    @api.model
+    def get_cache_stats(self):
+        """Report hit/miss counters and size of the block cache"""
+        return self._get_block_cache().stats()
+
+    # ==== QUERY COST GUARD ====
+    def _get_statement_timeout(self, blocks):
+        """Statement timeout (ms) for a query serving ``blocks``, the largest wins"""
+        default = int(self.env['ir.config_parameter'].sudo().get_param('dashboard.statement_timeout', 0))
+        return max([block.statement_timeout or default for block in blocks] or [default])
+
+    @contextmanager
+    def _statement_timeout(self, cr, timeout_ms):
+        """Apply a statement timeout to the queries run inside the block
+
+        The timeout lives in a savepoint, so a canceled query does not abort
+        the surrounding transaction.
+        """
+        if not timeout_ms:
+            yield
+            return
+        with cr.savepoint(flush=False):
+            cr.execute(
+                "SELECT current_setting('statement_timeout'), set_config('statement_timeout', %s, true)",
+                (f"{int(timeout_ms)}ms",)
+            )
+            previous = cr.fetchone()[0]
+            yield
+            cr.execute("SELECT set_config('statement_timeout', %s, true)", (previous,))
+
+    def _check_query_cost(self, cr, query, model=None, group_by=False):
+        """Refuse a query whose estimated cost or group count is over budget
+
+        Uses ``EXPLAIN`` for the total cost and ``pg_stats`` for the number
+        of distinct values of the group-by column. Both checks are disabled
+        while their budget parameter is 0.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        max_cost = float(params.get_param('dashboard.max_query_cost', 0))
+        max_groups = int(params.get_param('dashboard.max_chart_groups', 0))
+
+        if max_cost:
+            cr.execute(f"EXPLAIN (FORMAT JSON) {query}")
+            cost = cr.fetchone()[0][0]['Plan']['Total Cost']
+            if cost > max_cost:
+                raise QueryRefused(f"Query refused: estimated cost {cost:.0f} exceeds budget {max_cost:.0f}")
+
+        if max_groups and model is not None and group_by:
+            groups = self._estimate_group_count(cr, model, group_by)
+            if groups > max_groups:
+                raise QueryRefused(f"Query refused: about {groups:.0f} groups, limit is {max_groups}")
+
+    def _estimate_group_count(self, cr, model, group_by):
+        """Estimated number of distinct values of a column from planner statistics"""
+        cr.execute("""
+            SELECT s.n_distinct, c.reltuples
+              FROM pg_stats s
+              JOIN pg_class c ON c.relname = s.tablename
+             WHERE s.schemaname = current_schema() AND s.tablename = %s AND s.attname = %s
+        """, (model._table, group_by.name))
+        row = cr.fetchone()
+        if not row:
+            return 0
+        n_distinct, reltuples = row
+        # Negative n_distinct is a fraction of the row count
+        return -n_distinct * max(reltuples, 0) if n_distinct < 0 else n_distinct
+
+    def _get_date_bucket(self, rec):
+        """Time bucket of a chart grouped by a date/datetime field, or False"""
+        if rec.group_by_id.ttype in ('date', 'datetime') and rec.date_bucket in DATE_BUCKETS:
+            return rec.date_bucket
+        return False
+
+    def _get_chart_bucket(self, rec, model, bucket, start_date=None, end_date=None):
+        """Coarsen ``bucket`` until the chart fits ``dashboard.max_chart_groups``
+
+        The span is the requested date range, or the min/max of the column.
+        """
+        max_groups = int(self.env['ir.config_parameter'].sudo().get_param('dashboard.max_chart_groups', 0))
+        if not max_groups:
+            return bucket
+        if start_date and end_date:
+            low, high = fields.Date.to_date(start_date[:10]), fields.Date.to_date(end_date[:10])
+        else:
+            try:
+                low, high = self._get_date_span(rec, model)
+            except DEGRADED_ERRORS as e:
+                _logger.warning("Date span of chart %s unavailable, keeping %s buckets: %s", rec.name, bucket, e)
+                return bucket
+            if not low:
+                return bucket
+        span = (high - low).days + 1
+        buckets = list(BUCKET_DAYS)
+        for candidate in buckets[buckets.index(bucket):]:
+            if span / BUCKET_DAYS[candidate] <= max_groups:
+                if candidate != bucket:
+                    _logger.info("Chart %s bucketed by %s instead of %s to stay under %s groups",
+                                 rec.name, candidate, bucket, max_groups)
+                return candidate
+        return buckets[-1]
+
+    def _get_date_span(self, rec, model):
+        """``(min, max)`` dates of the group-by column of a chart
+
+        Read from the planner histogram when the table has statistics,
+        otherwise from the records of the block the user can read, as a
+        regular block query.
+        """
+        column = rec.group_by_id.name
+        self.env.cr.execute("""
+            SELECT bounds[1]::date, bounds[array_upper(bounds, 1)]::date
+              FROM (
+                SELECT histogram_bounds::text::timestamp[] AS bounds
+                  FROM pg_stats
+                 WHERE schemaname = current_schema() AND tablename = %s AND attname = %s
+              ) stats
+        """, (model._table, column))
+        row = self.env.cr.fetchone()
+        if row and row[0]:
+            return row
+        query = model._search(self._get_block_domain(rec))
+        column_sql = SQL.identifier(model._table, column)
+        sql = self.env.cr.mogrify(*query.select(
+            SQL("min(%s)::date AS low, max(%s)::date AS high", column_sql, column_sql)
+        )).decode("utf-8")
+        rows = self._execute_read_query(sql, timeout_ms=self._get_statement_timeout(rec), model=model)
+        return rows[0]['low'], rows[0]['high']
+
+    def _get_stale_block_data(self, rec, data, start_date=None, end_date=None):
+        """Last good data of a block whose query failed, flagged as stale"""
+        stale = self._get_block_cache().get_stale(self._get_cache_key(rec, start_date, end_date))
+        if stale is None:
+            return data
+        stale.update({'stale': True, 'stale_reason': data.get('error')})
+        return stale
+
+    # ==== APPROXIMATE COUNT ====
+    def _approximate_count(self, model, domain, method='estimate'):
+        """Approximate number of records of ``model`` matching ``domain``
+
+        Without any filter the table row estimate (``pg_class.reltuples``)
+        is used. Otherwise ``estimate`` takes the planner row estimate and
+        ``sample`` counts a ``TABLESAMPLE SYSTEM`` of
+        ``dashboard.count_sample_percent`` percent of the table. Below
+        ``dashboard.approx_count_min_rows`` rows the exact count is cheap
+        enough and is returned instead.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        min_rows = int(params.get_param('dashboard.approx_count_min_rows', 100000))
+        cr = model.env.cr
+        query = model._search(domain)
+
+        if not query.where_clause and not query._joins:
+            cr.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", (model._table,))
+            row = cr.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+            estimate = cr.fetchone()[0][0]['Plan']['Plan Rows']
+
+        # reltuples is -1 on a never analyzed table
+        if estimate < min_rows:
+            return model.search_count(domain)
+
+        if method == 'sample' and query.where_clause and not query._joins:
+            percent = float(params.get_param('dashboard.count_sample_percent', 1)) or 1
+            cr.execute(SQL(
+                "SELECT count(*) FROM %s TABLESAMPLE SYSTEM (%s) WHERE %s",
+                SQL.identifier(model._table), percent, query.where_clause,
+            ))
+            return round(cr.fetchone()[0] * 100 / percent)
+        return round(estimate)
+
+    # ==== READ REPLICA ====
+    def _run_on_read_model(self, model, func):
+        """Call ``func(read_model)`` on the replica when healthy, else on the primary"""
+        with replica_env(self.env) as env:
+            if env is not self.env:
+                try:
+                    return func(model.with_env(env))
+                except psycopg2.errors.QueryCanceled:
+                    raise
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    _logger.warning("Dashboard replica failed, retrying on the primary: %s", e)
+                    mark_replica_down(get_replica_dsn(self.env))
+        return func(model)
+
+    def _execute_read_query(self, query, timeout_ms=0, model=None, group_by=False, params=()):
+        """Run a read-only dashboard query and return its rows as dicts
+
+        ``query`` is SQL, or a compiled plan run as a prepared statement
+        with ``params``. The query is cost-checked, runs under
+        ``timeout_ms`` and in a savepoint, so the transaction stays usable
+        if it fails. A failing plan is deallocated and built again next time.
+        """
+        def execute(read_model):
+            cr = read_model.env.cr
+            try:
+                with self._statement_timeout(cr, timeout_ms), cr.savepoint(flush=False):
+                    sql = prepare_plan(cr, query, params) if isinstance(query, CompiledPlan) else query
+                    self._check_query_cost(cr, sql, model, group_by)
+                    cr.execute(sql)
+                    return cr.dictfetchall()
+            except psycopg2.Error:
+                if isinstance(query, CompiledPlan):
+                    discard_plan(cr, query)
+                raise
+
+        return self._run_on_read_model(self, execute)
+
+    # ==== FUSED QUERY PLANNER ====
+    def _group_blocks_by_model(self):
+        """Group blocks by their source model, skipping unknown models"""
+        groups = defaultdict(list)
+        for rec in self:
+            if rec.model_name and rec.model_name in self.env:
+                groups[rec.model_name].append(rec)
+        return groups
+
+    def _execute_fused(self, model, aggregates, start_date=None, end_date=None, group_by=False, timeout_ms=0):
+        """Run one fused query, return its rows or None when it cannot be fused
+
+        Timeouts and refused queries are raised: running the blocks one by
+        one would only be slower.
+        """
+        try:
+            model.check_access('read')
+            query = model.get_fused_query(
+                aggregates,
+                start_date=start_date,
+                end_date=end_date,
+                group_by=group_by,
+                apply_ir_rules=True
+            )
+            return self._execute_read_query(
+                query, timeout_ms=timeout_ms, model=model, group_by=group_by
+            )
+        except DEGRADED_ERRORS:
+            raise
+        except Exception as e:
+            _logger.warning("Fused query on %s failed, falling back to per-block queries: %s", model._name, e)
+            return None
+
+    def _get_fused_values(self, start_date=None, end_date=None, operation=None):
+        """Evaluate the scalar aggregate of every block with one query per model
+
+        ``operation`` overrides the block operation (e.g. ``count`` for list
+        totals). Returns ``{block: value}``; blocks missing from the result
+        could not be fused and must be evaluated on their own, blocks mapped
+        to None timed out or were refused.
+        """
+        values = {}
+        for model_name, recs in self._group_blocks_by_model().items():
+            model = self.env[model_name]
+            aggregates = []
+            planned = []
+            for rec in recs:
+                op = operation or rec.operation or 'count'
+                if not operation and op == 'count' and rec.count_mode != 'exact':
+                    # Approximate counts are cheaper than any exact scan
+                    continue
+                field_name = rec.measured_field_id.name if rec.measured_field_id else None
+                if op != 'count' and (not field_name or field_name not in model._fields):
+                    continue
+                aggregates.append((f"block_{len(planned)}", op, field_name, self._parse_domain(rec.filter)))
+                planned.append(rec)
+
+            if not aggregates:
+                continue
+
+            try:
+                rows = self._execute_fused(
+                    model, aggregates, start_date, end_date,
+                    timeout_ms=self._get_statement_timeout(planned)
+                )
+            except DEGRADED_ERRORS as e:
+                _logger.warning("Fused query on %s degraded: %s", model_name, e)
+                values.update(dict.fromkeys(planned))
+                continue
+            if not rows:
+                continue
+            for index, rec in enumerate(planned):
+                values[rec] = rows[0].get(f"block_{index}") or 0.0
+        return values
+
+    def _get_fused_chart_data(self, start_date=None, end_date=None):
+        """Evaluate charts sharing a model and group-by field with one query
+
+        Returns ``{block_id: chart_data}`` for the charts that were fused.
+        Charts alone in their group keep the regular ``get_query`` path.
+        """
+        groups = defaultdict(list)
+        for model_name, recs in self._group_blocks_by_model().items():
+            for rec in recs:
+                if (rec.type == 'graph' and rec.group_by_id and not self._get_date_bucket(rec)
+                        and not rec.top_n):
+                    groups[(model_name, rec.group_by_id)].append(rec)
+
+        chart_data = {}
+        for (model_name, group_by), recs in groups.items():
+            if len(recs) < 2:
+                continue
+            model = self.env[model_name]
+            aggregates = [
+                (
+                    f"block_{index}",
+                    rec.operation or 'count',
+                    rec.measured_field_id.name if rec.measured_field_id else None,
+                    self._parse_domain(rec.filter),
+                )
+                for index, rec in enumerate(recs)
+            ]
+
+            try:
+                rows = self._execute_fused(
+                    model, aggregates, start_date, end_date, group_by=group_by,
+                    timeout_ms=self._get_statement_timeout(recs)
+                )
+            except DEGRADED_ERRORS as e:
+                for rec in recs:
+                    chart_data[rec.id] = {'error': str(e), 'degraded': True}
+                continue
+            if rows is None:
+                continue
+            for index, rec in enumerate(recs):
+                alias = f"block_{index}"
+                records = [
+                    {group_by.name: row.get(group_by.name), 'value': row.get(alias)}
+                    for row in rows if row.get(f"{alias}__count")
+                ]
+                chart_data[rec.id] = self._prepare_chart_data(rec, records)
+        return chart_data
+
+    def _get_fused_block_data(self, start_date=None, end_date=None):
+        """Prefetch the fusable part of every block of a dashboard
+
+        Charts get their full payload, tables their ``total`` count and
+        tiles their snapshot ``series``.
+        Returns ``{block_id: data}``.
+        """
+        if not (start_date and end_date):
+            start_date = end_date = None
+
+        fused = self._get_fused_chart_data(start_date, end_date)
+
+        tile_blocks = self.filtered(lambda b: b.type in ('tile', 'kpi'))
+        series = self.env['dashboard.block.snapshot']._get_series(tile_blocks)
+        for rec in tile_blocks:
+            fused[rec.id] = {'series': series.get(rec.id, [])}
+
+        list_blocks = self.filtered(
+            lambda b: b.type == 'list' and b.tag_fields_ids and b.list_total_mode == 'exact'
+        )
+        totals = list_blocks._get_fused_values(start_date, end_date, operation='count')
+        for rec, total in totals.items():
+            if total is None:
+                fused[rec.id] = {'error': "Query timed out or refused", 'degraded': True}
+            else:
+                fused[rec.id] = {'total': int(total)}
+        return fused
+
     # ==== DEFAULT METHODS ====
     def _get_default_action(self):
         """Get default client action"""
@@ -336,51 +968,442 @@ class DashboardBlock(models.Model):
     @api.model
     def get_dashboard_vals(self, action_id, start_date=None, end_date=None):
         """Fetch block values from js and create chart"""
-        block_vals = []
-        
+        blocks = self._get_dashboard_blocks(action_id)
+        return self._prepare_block_vals(blocks, start_date, end_date)
+
+    @api.model
+    def get_dashboard_delta(self, action_id, tokens, start_date=None, end_date=None, compact=False):
+        """Return only the blocks whose config or data changed
+
+        ``tokens`` maps block ids to the ``{'config': ..., 'data': ...}``
+        version tokens held by the client. Unchanged blocks are only listed
+        in ``not_modified``; changed blocks omit the part that did not
+        change; blocks no longer on the dashboard are listed in ``removed``.
+        ``compact`` sends the data in the columnar format.
+        """
+        tokens = {int(block_id): token or {} for block_id, token in (tokens or {}).items()}
+        blocks = self._get_dashboard_blocks(action_id)
+
+        changed = []
+        not_modified = []
+        for vals in self._prepare_block_vals(blocks, start_date, end_date):
+            token = tokens.get(vals['id'])
+            if token is None:
+                changed.append(vals)
+                continue
+
+            config_changed = token.get('config') != vals['config_token']
+            data_changed = token.get('data') != vals['data_token']
+            if not (config_changed or data_changed):
+                not_modified.append(vals['id'])
+                continue
+            if not config_changed:
+                for key in CONFIG_KEYS:
+                    vals.pop(key, None)
+            if not data_changed:
+                vals.pop('data', None)
+            changed.append(vals)
+
+        if compact:
+            for vals in changed:
+                if 'data' in vals:
+                    vals['data'] = self._compact_block_data(vals['data'])
+
+        return {
+            'blocks': changed,
+            'not_modified': not_modified,
+            'removed': [block_id for block_id in tokens if block_id not in blocks.ids],
+            'layout_version': self.get_layout_version(action_id),
+        }
+
+    def _get_dashboard_blocks(self, action_id):
+        """Active blocks of a dashboard in grid order"""
         # PERBAIKAN: Gunakan sudo() dengan hati-hati, hanya untuk read
-        blocks = self.env['dashboard.block'].search(
+        return self.env['dashboard.block'].search(
             [
                 ('client_action_id', '=', int(action_id)), 
                 ('active', '=', True)
             ],
             order='data_y, data_x'
         )
-        
+
+    def _get_version_token(self, value):
+        """Short stable hash of a JSON-serializable value"""
+        payload = json.dumps(value, sort_keys=True, default=json_default)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def _prepare_block_vals(self, blocks, start_date=None, end_date=None):
+        """Build the client values of ``blocks`` with config and data tokens"""
+        block_data = self._prepare_block_data(blocks, start_date, end_date)
+        block_vals = []
+        for rec in blocks:
+            vals = self._prepare_block_layout(rec)
+            vals.update(block_data[rec.id])
+            block_vals.append(vals)
+        return block_vals
+
+    def _prepare_block_layout(self, rec):
+        """Client values of a block without its data"""
+        try:
+            vals = {
+                'id': rec.id,
+                'name': rec.name,
+                'type': rec.type,
+                'model_name': rec.model_name,
+                'active': rec.active,
+                'grid_position': {
+                    'x': rec.data_x or 0,
+                    'y': rec.data_y or 0,
+                    'w': rec.grid_width or 1,
+                    'h': rec.grid_height or 1
+                },
+                'config': self._get_block_config(rec),
+            }
+        except Exception as e:
+            _logger.error("Error preparing block %s: %s", rec.name, e)
+            vals = {
+                'id': rec.id,
+                'name': rec.name,
+                'type': rec.type,
+                'config': {},
+            }
+
+        vals['config_token'] = self._get_version_token(
+            [vals['name'], vals['type'], vals.get('grid_position'), vals['config']]
+        )
+        return vals
+
+    def _prepare_block_data(self, blocks, start_date=None, end_date=None):
+        """Return ``{block_id: {'data', 'last_update', 'error', 'data_token'}}``"""
+        cached = self._get_cached_block_data(blocks, start_date, end_date)
+        missing = blocks.filtered(lambda b: b.id not in cached)
+        fused = missing._get_fused_block_data(start_date, end_date)
+
+        computed = {}
+        parallel_limit = self._get_parallel_limit()
+        if parallel_limit > 1 and len(missing) > 1:
+            computed = self._evaluate_blocks_parallel(missing, start_date, end_date, fused, parallel_limit)
+
+        block_data = {}
         for rec in blocks:
             try:
+                data = cached.get(rec.id)
+                if data is not None:
+                    self._record_block_stat(rec, {'row_count': self._get_result_rows(data)}, cache_hit=True)
+                else:
+                    data = computed.get(rec.id)
+                if data is None:
+                    data = self._evaluate_block(rec, start_date, end_date, fused.get(rec.id))
+                if isinstance(data, Exception):
+                    raise data
+
                 vals = {
-                    'id': rec.id,
-                    'name': rec.name,
-                    'type': rec.type,
-                    'model_name': rec.model_name,
-                    'active': rec.active,
-                    'grid_position': {
-                        'x': rec.data_x or 0,
-                        'y': rec.data_y or 0,
-                        'w': rec.grid_width or 1,
-                        'h': rec.grid_height or 1
-                    },
-                    'config': self._get_block_config(rec),
-                    'data': self._get_block_data(rec, start_date, end_date),
+                    'data': data,
                     'last_update': rec.last_update.isoformat() if rec.last_update else None,
                     'error': None
                 }
             except Exception as e:
                 _logger.error("Error preparing block %s: %s", rec.name, e)
                 vals = {
-                    'id': rec.id,
-                    'name': rec.name,
-                    'type': rec.type,
                     'error': f"Error: {str(e)}",
-                    'config': {},
                     'data': {}
                 }
-            
+
+            vals['data_token'] = self._get_version_token([vals['data'], vals['error']])
+            block_data[rec.id] = vals
+        self._flush_block_stats()
+        return block_data
+
+    def _evaluate_block(self, rec, start_date=None, end_date=None, fused=None):
+        """Compute the data of one block, measure it and store it in the cache"""
+        with measure() as sample:
+            data = self._get_block_data(rec, start_date, end_date, fused)
+        sample['row_count'] = self._get_result_rows(data)
+        self._record_block_stat(rec, sample, start_date=start_date, end_date=end_date)
+        if isinstance(data, dict) and data.get('degraded'):
+            return self._get_stale_block_data(rec, data, start_date, end_date)
+        self._set_cached_block_data(rec, data, start_date, end_date)
+        return data
+
+    # ==== PARALLEL EVALUATION ====
+    def _get_parallel_limit(self):
+        """Maximum number of blocks of one request evaluated concurrently
+
+        Tests only evaluate in parallel in registry test mode, where worker
+        cursors share the test transaction.
+        """
+        if getattr(threading.current_thread(), 'testing', False) and not self.env.registry.in_test_mode():
+            # Test data lives in the test transaction, invisible to other cursors
+            return 0
+        return int(self.env['ir.config_parameter'].sudo().get_param('dashboard.parallel_workers', 0))
+
+    def _evaluate_blocks_parallel(self, blocks, start_date, end_date, fused, limit):
+        """Evaluate blocks on the shared worker pool
+
+        Each block gets its own read-only cursor and an environment for the
+        same user, companies and context, so record rules still apply.
+        Returns ``{block_id: data or exception}``.
+        """
+        self.env.flush_all()
+        registry = self.env.registry
+        dbname = self.env.cr.dbname
+        uid = self.env.uid
+        su = self.env.su
+        context = dict(self.env.context)
+
+        def evaluate(block_id):
+            threading.current_thread().dbname = dbname
+            with registry.cursor() as cr:
+                if not registry.in_test_mode():
+                    # Test cursors share the test transaction, which stays writable
+                    cr.execute("SET TRANSACTION READ ONLY")
+                env = api.Environment(cr, uid, context, su=su)
+                model = env['dashboard.block']
+                return model._evaluate_block(
+                    model.browse(block_id), start_date, end_date, fused.get(block_id)
+                )
+
+        pool_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'dashboard.parallel_pool_size', DEFAULT_POOL_SIZE))
+        limit = max(min(limit, pool_size, MAX_POOL_SIZE), 1)
+        return run_bounded(get_executor(), evaluate, blocks.ids, limit)
+
+    # ==== LIST PAGINATION ====
+    def _get_list_order(self, rec):
+        """Return ``(sort field or None, ORM order)`` of a table block
+
+        The id is always the last key so the order is total, as keyset
+        pagination needs.
+        """
+        direction = 'desc' if rec.list_sort_desc else 'asc'
+        sort_field = rec.list_sort_field_id.name
+        if not sort_field or sort_field == 'id':
+            return None, f"id {direction}"
+        return sort_field, f"{sort_field} {direction} NULLS LAST, id {direction}"
+
+    def _get_keyset_domain(self, rec, cursor):
+        """Domain of the rows after ``cursor`` in the block order"""
+        sort_field, _order = self._get_list_order(rec)
+        last_id, last_value = self._decode_list_cursor(cursor)
+        operator = '<' if rec.list_sort_desc else '>'
+        if not sort_field:
+            return [('id', operator, last_id)]
+        if last_value is None:
+            # Already in the trailing NULL rows
+            return [(sort_field, '=', False), ('id', operator, last_id)]
+        return [
+            '|', '|',
+            (sort_field, operator, last_value),
+            '&', (sort_field, '=', last_value), ('id', operator, last_id),
+            (sort_field, '=', False),
+        ]
+
+    def _encode_list_cursor(self, key):
+        """Opaque token of a ``(id, sort value)`` row key"""
+        return base64.urlsafe_b64encode(json.dumps(list(key), default=json_default).encode()).decode()
+
+    def _decode_list_cursor(self, cursor):
+        """``(id, sort value)`` of a cursor sent by the client, ValueError when malformed"""
+        try:
+            last_id, last_value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            last_id = int(last_id)
+        except (AttributeError, TypeError, ValueError) as e:
+            # binascii.Error and JSONDecodeError are ValueErrors
+            raise ValueError(f"Invalid page cursor: {e}") from None
+        if isinstance(last_value, (list, dict)):
+            raise ValueError("Invalid page cursor: unexpected sort value")
+        return last_id, last_value
+
+    @api.model
+    def get_list_page(self, block_id, cursor=None, start_date=None, end_date=None):
+        """Return the table page of block ``block_id`` following ``cursor``"""
+        rec = self.browse(int(block_id)).exists()
+        if not rec or rec.type != 'list' or not rec.model_name:
+            return {'error': 'Table block not found'}
+        if cursor:
+            try:
+                self._decode_list_cursor(cursor)
+            except ValueError as e:
+                _logger.warning("Table block %s: %s", rec.name, e)
+                return {'error': 'Invalid page cursor, reload the table'}
+        domain = self._get_block_domain(rec, start_date, end_date)
+        return self._get_list_data(rec, self.env[rec.model_name], domain, cursor=cursor)
+
+    # ==== INDEX ADVISOR ====
+    def _get_block_sql(self, rec, start_date=None, end_date=None):
+        """SQL the dashboard runs for a block, or None when it has no query"""
+        if not rec.model_name or rec.model_name not in self.env:
+            return None
+        model = self.env[rec.model_name]
+        cr = self.env.cr
+        if rec.type == 'graph':
+            if not rec.group_by_id:
+                return None
+            if not (start_date and end_date or self._get_date_bucket(rec)):
+                start_date = end_date = None
+            return self._get_chart_query(rec, model, self._get_block_domain(rec), start_date, end_date)[0]
+        domain = self._get_block_domain(rec, start_date, end_date)
+        if rec.type == 'list':
+            _sort_field, order = self._get_list_order(rec)
+            query = model._search(domain, order=order, limit=(rec.table_limit or 10) + 1)
+            return cr.mogrify(*query.select()).decode("utf-8")
+        return cr.mogrify(*model._search(domain).select(SQL("COUNT(*)"))).decode("utf-8")
+
+    def action_advise_indexes(self):
+        """EXPLAIN the blocks and list the indexes that would speed them up"""
+        advices = self.env['dashboard.index.advice']._advise_blocks(self)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Index Advice',
+            'res_model': 'dashboard.index.advice',
+            'view_mode': 'list,form',
+            'domain': [('block_id', 'in', self.ids)],
+            'context': {'search_default_proposed': bool(advices)},
+        }
+
+    # ==== TELEMETRY ====
+    def _get_result_rows(self, data):
+        """Number of rows shipped for a block result"""
+        if not isinstance(data, dict):
+            return 0
+        if 'rows' in data:
+            return len(data['rows'])
+        if 'labels' in data:
+            return len(data['labels'])
+        return 1 if 'value' in data else 0
+
+    def _record_block_stat(self, rec, sample, source='dashboard', cache_hit=False,
+                           start_date=None, end_date=None):
+        """Queue a telemetry sample; slow evaluations are logged with their SQL
+
+        Only one cache hit in ``dashboard.stat_hit_sample_rate`` is kept,
+        weighted by the rate.
+        """
+        if not isinstance(rec.id, int):
+            return
+        params = self.env['ir.config_parameter'].sudo()
+        weight = 1
+        if cache_hit:
+            weight = max(int(params.get_param('dashboard.stat_hit_sample_rate', 10)), 1)
+            if random.randrange(weight):
+                return
+        sample = dict(
+            sample, block_id=rec.id, source=source, cache_hit=cache_hit, weight=weight, date=fields.Datetime.now(),
+        )
+        slow_ms = int(params.get_param('dashboard.slow_block_ms', 1000))
+        if slow_ms and sample.get('wall_time', 0) >= slow_ms:
+            try:
+                sample['query'] = self._get_block_sql(rec, start_date, end_date)
+            except Exception as e:
+                sample['query'] = f"-- SQL unavailable: {e}"
+            _logger.warning(
+                "Slow dashboard block %s (id %s): %.0f ms, %.0f ms SQL in %d queries\n%s",
+                rec.name, rec.id, sample['wall_time'], sample.get('sql_time', 0),
+                sample.get('query_count', 0), sample['query'],
+            )
+        record_sample(self.env.cr.dbname, sample)
+
+    def _flush_block_stats(self, force=False):
+        self.env['dashboard.block.stat'].sudo()._flush_samples(force)
+
+    def _compute_latency(self):
+        stats = self.env['dashboard.block.stat.report'].sudo().search_read(
+            [('block_id', 'in', [block_id for block_id in self.ids if isinstance(block_id, int)])],
+            ['block_id', 'p50_time', 'p95_time', 'calls', 'cache_hit_ratio']
+        )
+        stats = {stat['block_id'][0]: stat for stat in stats}
+        for rec in self:
+            stat = stats.get(rec.id, {})
+            rec.latency_p50 = stat.get('p50_time') or 0.0
+            rec.latency_p95 = stat.get('p95_time') or 0.0
+            rec.stat_calls = stat.get('calls') or 0
+            rec.cache_hit_ratio = stat.get('cache_hit_ratio') or 0.0
+
+    def action_view_stats(self):
+        """Recent evaluations of the block"""
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Block Evaluations',
+            'res_model': 'dashboard.block.stat',
+            'view_mode': 'list,form',
+            'domain': [('block_id', 'in', self.ids)],
+        }
+
+    # ==== PROGRESSIVE LOADING ====
+    def _get_block_costs(self, blocks):
+        """Median evaluation time (ms) of each block, or a guess based on its type"""
+        stats = self.env['dashboard.block.stat.report'].sudo().search_read(
+            [('block_id', 'in', blocks.ids)], ['block_id', 'p50_time']
+        )
+        costs = {stat['block_id'][0]: stat['p50_time'] for stat in stats if stat['p50_time']}
+        return {
+            rec.id: costs.get(rec.id, DEFAULT_BLOCK_COSTS.get(rec.type, 100.0))
+            for rec in blocks
+        }
+
+    @api.model
+    def get_dashboard_layout(self, action_id):
+        """Return layout and config of all blocks, cheapest blocks first
+
+        The data is fetched afterwards with ``get_blocks_data`` so slow
+        blocks do not hold up the first paint.
+        """
+        blocks = self._get_dashboard_blocks(action_id)
+        costs = self._get_block_costs(blocks)
+        blocks = blocks.sorted(key=lambda b: costs[b.id])
+        block_vals = []
+        for rec in blocks:
+            vals = self._prepare_block_layout(rec)
+            vals.update({'data': None, 'data_token': None, 'error': None})
             block_vals.append(vals)
-            
         return block_vals
-    
+
+    @api.model
+    def get_blocks_data(self, block_ids, start_date=None, end_date=None, compact=False):
+        """Return the data of a batch of blocks as ``[{'id', 'data', ...}]``
+
+        With ``compact``, table and chart data use the columnar format of
+        ``_compact_block_data``.
+        """
+        blocks = self.search([('id', 'in', [int(block_id) for block_id in block_ids]), ('active', '=', True)])
+        block_data = self._prepare_block_data(blocks, start_date, end_date)
+        result = [dict(block_data[rec.id], id=rec.id) for rec in blocks]
+        if compact:
+            for vals in result:
+                vals['data'] = self._compact_block_data(vals['data'])
+        return result
+
+    # ==== COMPACT PAYLOAD ====
+    def _compact_block_data(self, data):
+        """Columnar form of table rows and chart series
+
+        Table rows become one array per column instead of a dict per row,
+        and charts drop the dataset wrapper. Other data is returned
+        unchanged. Tokens are always computed on the verbose form.
+        """
+        if not isinstance(data, dict) or data.get('error'):
+            return data
+        if 'rows' in data and 'columns' in data:
+            rows = data['rows']
+            compact = {key: value for key, value in data.items() if key != 'rows'}
+            compact.update({
+                'format': 'columnar',
+                'ids': [row.get('id') for row in rows],
+                'values': [[row.get(column) for row in rows] for column in data['columns']],
+            })
+            return compact
+        if 'labels' in data and 'datasets' in data:
+            dataset = data['datasets'][0] if data['datasets'] else {}
+            compact = {key: value for key, value in data.items() if key != 'datasets'}
+            compact.update({
+                'format': 'columnar',
+                'series': dataset.get('data', []),
+                'series_label': dataset.get('label'),
+                'series_colors': dataset.get('backgroundColor'),
+            })
+            return compact
+        return data
+
     def _get_block_config(self, rec):
         """Get block configuration"""
         config = {
@@ -413,70 +1436,135 @@ class DashboardBlock(models.Model):
             config.update({
                 'columns': rec.tag_fields_ids.mapped('name') if rec.tag_fields_ids else [],
                 'limit': rec.table_limit or 10,
-                'pagination': rec.show_pagination
+                'pagination': rec.show_pagination,
+                'total_mode': rec.list_total_mode
             })
             
         return config
     
-    def _get_block_data(self, rec, start_date=None, end_date=None):
-        """Get block data based on type"""
+    def _get_block_data(self, rec, start_date=None, end_date=None, fused=None):
+        """Get block data based on type
+
+        ``fused`` is the block entry prefetched by ``_get_fused_block_data``.
+        """
         try:
             if not rec.model_name:
                 return {'error': 'No model selected'}
                 
+            if fused and fused.get('degraded'):
+                return fused
+
             target_model = self.env[rec.model_name]
-            domain = self._parse_domain(rec.filter) if rec.filter else []
-            
-            # Add date filters if provided
-            if start_date and end_date:
-                date_domain = [('create_date', '>=', start_date), ('create_date', '<=', end_date)]
-                if domain:
-                    domain = expression.AND([domain, date_domain])
-                else:
-                    domain = date_domain
+            domain = self._get_block_domain(rec, start_date, end_date)
             
             if rec.type == 'list':
-                return self._get_list_data(rec, target_model, domain)
+                total = fused.get('total') if fused else None
+                return self._get_list_data(rec, target_model, domain, total=total)
             elif rec.type == 'graph':
-                return self._get_chart_data(rec, target_model, domain)
+                if fused is not None:
+                    return fused
+                if not (start_date and end_date or self._get_date_bucket(rec)):
+                    start_date = end_date = None
+                # The chart query applies the date range itself, as parameters
+                return self._get_chart_data(
+                    rec, target_model, self._get_block_domain(rec), start_date, end_date
+                )
             else:  # tile/kpi
-                return self._get_tile_data(rec, target_model, domain)
+                series = fused.get('series') if fused else None
+                return self._get_tile_data(rec, target_model, domain, series=series)
                 
         except Exception as e:
             _logger.error("Error getting data for block %s: %s", rec.name, e)
             return {'error': str(e)}
     
-    def _get_list_data(self, rec, model, domain):
-        """Get table data"""
+    def _get_block_domain(self, rec, start_date=None, end_date=None):
+        """Domain of the block filter, restricted to the date range if provided"""
+        domain = self._parse_domain(rec.filter) if rec.filter else []
+        if start_date and end_date:
+            date_domain = [('create_date', '>=', start_date), ('create_date', '<=', end_date)]
+            if domain:
+                domain = expression.AND([domain, date_domain])
+            else:
+                domain = date_domain
+        return domain
+
+    def _get_list_data(self, rec, model, domain, total=None, cursor=None):
+        """Get one page of table data
+
+        Pages are fetched with keyset pagination on the sort column and id,
+        so every page costs the same as the first. ``cursor`` is the
+        ``next_cursor`` of the previous page. The total is only computed
+        for the first page.
+        """
         if not rec.tag_fields_ids:
             return {'error': 'No columns selected for table'}
             
         fields = rec.tag_fields_ids.mapped('name')
+        limit = rec.table_limit or 10
         
         try:
-            records = model.search_read(
-                domain=domain,
-                fields=fields,
-                limit=rec.table_limit or 10,
-                order='id desc'  # Default order by latest
-            )
+            def read(read_model):
+                cr = read_model.env.cr
+                with self._statement_timeout(cr, self._get_statement_timeout(rec)):
+                    sort_field, order = self._get_list_order(rec)
+                    page_domain = domain
+                    if cursor:
+                        page_domain = expression.AND([domain, self._get_keyset_domain(rec, cursor)])
+                    # One extra row tells whether there is a next page
+                    query = read_model._search(page_domain, order=order, limit=limit + 1)
+                    sort_sql = SQL.identifier(read_model._table, sort_field or 'id')
+                    select = query.select(SQL.identifier(read_model._table, 'id'), sort_sql)
+                    self._check_query_cost(cr, cr.mogrify(*select).decode("utf-8"))
+                    cr.execute(select)
+                    keys = cr.fetchall()
+                    has_more = len(keys) > limit
+                    keys = keys[:limit]
+                    records = read_model.browse([key[0] for key in keys]).read(fields)
+
+                    count = None
+                    if not cursor:
+                        if rec.list_total_mode == 'exact':
+                            count = total if total is not None else read_model.search_count(domain)
+                        elif rec.list_total_mode in ('estimate', 'sample'):
+                            count = self._approximate_count(read_model, domain, rec.list_total_mode)
+                return records, count, (self._encode_list_cursor(keys[-1]) if has_more else False)
+
+            records, count, next_cursor = self._run_on_read_model(model, read)
             
             return {
                 'columns': fields,
                 'rows': records,
-                'total': model.search_count(domain),
-                'limit': rec.table_limit or 10
+                'total': count,
+                'total_estimated': rec.list_total_mode in ('estimate', 'sample'),
+                'limit': limit,
+                'next_cursor': next_cursor
             }
         except Exception as e:
             _logger.error("Error fetching list data: %s", e)
-            return {'error': f"Data fetch error: {str(e)}"}
+            return {'error': f"Data fetch error: {str(e)}", 'degraded': isinstance(e, DEGRADED_ERRORS)}
     
-    def _get_chart_data(self, rec, model, domain, start_date=None, end_date=None):
-        """Get chart data using direct SQL query (model lama style)"""
-        if not rec.group_by_id:
-            return {'error': 'No group by field selected for chart'}
+    def _get_chart_query(self, rec, model, domain, start_date=None, end_date=None, bucket=None, top_n=None):
+        """Return ``(SQL, bucket)`` of a chart block
 
-        try:
+        ``bucket`` is the time bucket already chosen for the date range,
+        computed when None. ``top_n`` overrides the block's top-N limit.
+        """
+        if bucket is None:
+            bucket = self._get_date_bucket(rec)
+            if bucket:
+                bucket = self._get_chart_bucket(rec, model, bucket, start_date, end_date)
+            query = model.get_bucket_query(
+                args=domain,
+                operation=rec.operation,
+                field=rec.measured_field_id,
+                group_by=rec.group_by_id,
+                bucket=bucket,
+                tz=self.env.context.get('tz') or self.env.user.tz or 'UTC',
+                start_date=start_date,
+                end_date=end_date,
+                apply_ir_rules=True
+            )
+        else:
             # Gunakan method get_query yang sudah ditambahkan ke model
             query = model.get_query(
                 args=domain,
@@ -485,46 +1573,131 @@ class DashboardBlock(models.Model):
                 start_date=start_date,
                 end_date=end_date,
                 group_by=rec.group_by_id,
-                apply_ir_rules=True
+                apply_ir_rules=True,
+                limit=max(rec.top_n if top_n is None else top_n, 0),
+                descending=rec.top_n_desc
             )
+        return query, bucket
 
-            self._cr.execute(query)
-            records = self._cr.dictfetchall()
-
-            group_field = rec.group_by_id.name
-            x_axis = []
-            y_axis = []
+    def _get_chart_data(self, rec, model, domain, start_date=None, end_date=None):
+        """Get chart data using direct SQL query (model lama style)"""
+        if not rec.group_by_id:
+            return {'error': 'No group by field selected for chart'}
 
-            for record in records:
-                # Nilai sumbu X (group by)
-                x_val = record.get(group_field)
-                if isinstance(x_val, dict) and 'name' in x_val:
-                    x_val = x_val.get('name')  # Untuk field many2one
-                elif x_val is False:
-                    x_val = 'Undefined'
-                x_axis.append(x_val)
+        try:
+            plan, params, bucket = self._get_chart_plan(rec, model, domain, start_date, end_date)
 
-                # Nilai sumbu Y (hasil agregasi)
-                y_axis.append(record.get('value', 0))
+            records = self._execute_read_query(
+                plan,
+                params=params,
+                timeout_ms=self._get_statement_timeout(rec),
+                model=model,
+                # Buckets and top N bound the groups, not the distinct values
+                group_by=not (bucket or rec.top_n > 0) and rec.group_by_id
+            )
 
-            return {
-                'labels': x_axis,
-                'datasets': [{
-                    'label': rec.name,
-                    'data': y_axis,
-                    'backgroundColor': self._generate_colors(len(y_axis))
-                }]
-            }
+            return self._prepare_chart_data(rec, records)
 
         except Exception as e:
             _logger.error("Error in _get_chart_data: %s", e)
-            return {'error': str(e)}
+            return {'error': str(e), 'degraded': isinstance(e, DEGRADED_ERRORS)}
+
+    # ==== COMPILED PLANS ====
+    def _get_rule_fingerprint(self, model):
+        """Token of the record rules restricting the current user on ``model``"""
+        if model.env.su:
+            return ''
+        domain = model.env['ir.rule']._compute_domain(model._name, 'read')
+        return self._get_version_token(repr(domain)) if domain else ''
+
+    def _get_chart_plan(self, rec, model, domain, start_date=None, end_date=None):
+        """Return ``(plan, params, bucket)`` of a chart block
+
+        The SQL is built once per block version and configuration, domain
+        and access fingerprint, with the date range left as ``$n`` parameters.
+        Repeated loads skip the query construction and reuse the prepared
+        statement. The configuration is part of the key as ``write_date``
+        does not change within a transaction.
+        """
+        bucket = self._get_date_bucket(rec)
+        if bucket:
+            bucket = self._get_chart_bucket(rec, model, bucket, start_date, end_date)
+        has_start = bool(start_date and start_date != 'null')
+        has_end = bool(end_date and end_date != 'null')
+        params = [date for date, given in ((start_date, has_start), (end_date, has_end)) if given]
+        key = (
+            self.env.cr.dbname,
+            rec.id,
+            rec.write_date and rec.write_date.isoformat(),
+            rec.model_name,
+            rec.operation,
+            rec.measured_field_id.id,
+            rec.group_by_id.id,
+            rec.top_n,
+            rec.top_n_desc,
+            repr(domain),
+            has_start,
+            has_end,
+            bucket,
+            *self._get_access_fingerprint(rec),
+        )
+        plan = get_plan(key)
+        if plan is None:
+            slots = iter(get_slots(len(params)))
+            query, _bucket = self._get_chart_query(
+                rec, model, domain,
+                next(slots) if has_start else None,
+                next(slots) if has_end else None,
+                bucket=bucket,
+            )
+            plan = compile_plan(query, len(params))
+            set_plan(key, plan)
+        return plan, params, bucket
+
+    def _prepare_chart_data(self, rec, records):
+        """Convert grouped query rows into the chart payload"""
+        group_field = rec.group_by_id.name
+        x_axis = []
+        y_axis = []
+
+        for record in records:
+            # Nilai sumbu X (group by)
+            x_val = record.get(group_field)
+            if record.get('is_others'):
+                x_val = 'Others'
+            elif isinstance(x_val, dict) and 'name' in x_val:
+                x_val = x_val.get('name')  # Untuk field many2one
+            elif x_val is False:
+                x_val = 'Undefined'
+            x_axis.append(x_val)
+
+            # Nilai sumbu Y (hasil agregasi)
+            y_axis.append(record.get('value', 0))
+
+        colors = self._generate_colors(len(y_axis))
+        if records and records[-1].get('is_others'):
+            colors[-1] = 'hsl(0, 0%, 75%)'
+
+        return {
+            'labels': x_axis,
+            'datasets': [{
+                'label': rec.name,
+                'data': y_axis,
+                'backgroundColor': colors
+            }]
+        }
         
-    def _get_tile_data(self, rec, model, domain):
-        """Get tile/KPI data"""
+    def _get_tile_data(self, rec, model, domain, series=None):
+        """Get tile/KPI data
+
+        ``series`` holds the ``(date, value)`` snapshots of the closed
+        periods; the last one is the previous-period value.
+        """
         try:
+            if series is None:
+                series = self.env['dashboard.block.snapshot']._get_series(rec).get(rec.id, [])
             current_value = rec.record_value
-            previous_value = rec.prev_value
+            previous_value = series[-1][1] if series else rec.prev_value
             target_value = rec.target_value
             
             # Calculate trend
@@ -544,7 +1717,10 @@ class DashboardBlock(models.Model):
                 achievement = (current_value / target_value) * 100
             
             # Format numbers
+            approximate = rec.operation == 'count' and rec.count_mode != 'exact'
             formatted_value = self._format_number(current_value)
+            if approximate:
+                formatted_value = f"≈ {formatted_value}"
             formatted_target = self._format_number(target_value) if target_value != 0 else "0"
             
             return {
@@ -555,7 +1731,10 @@ class DashboardBlock(models.Model):
                 'formatted_target': formatted_target,
                 'trend': round(trend, 2),
                 'trend_direction': trend_direction,
-                'achievement': round(achievement, 2)
+                'achievement': round(achievement, 2),
+                'sparkline': [value for _date, value in series] + [current_value],
+                'stale': rec.value_stale,
+                'approximate': approximate
             }
         except Exception as e:
             _logger.error("Error calculating tile data: %s", e)
@@ -566,50 +1745,168 @@ class DashboardBlock(models.Model):
             }
             
     @api.model
-    def get_save_layout(self, grid_data_list):
-        """Save edited layout values"""
+    def get_layout_version(self, action_id):
+        """Layout version of a dashboard, sent back by the client when saving"""
+        return self.env['ir.actions.client'].sudo().browse(int(action_id)).shell_layout_version
+
+    @api.model
+    def get_save_layout(self, grid_data_list, action_id=None, layout_version=None):
+        """Save edited layout values in one statement
+
+        With ``layout_version``, the save is refused when another user saved
+        the layout of dashboard ``action_id`` since it was loaded. Layout
+        fields are written without touching ``write_date``, so cached block
+        data and stored values stay valid.
+        """
+        rows = []
         for data in grid_data_list:
-            block = self.browse(int(data['id']))
-            if not block:
-                continue
-                
-            updates = {}
-            if 'x' in data and 'y' in data:
-                updates.update({
-                    'data_x': int(data['x']),
-                    'data_y': int(data['y'])
-                })
-            
-            if 'w' in data and 'h' in data:
-                updates.update({
-                    'grid_width': int(data['w']),
-                    'grid_height': int(data['h'])
-                })
-            
-            if 'height' in data:
-                updates.update({
-                    'height': f"{data['height']}px"
-                    # 'width': f"{data['width']}px"
-                })
-            
-            if updates:
-                block.write(updates)
-                
-        return {'success': True, 'message': 'Layout saved successfully'}
+            has_position = 'x' in data and 'y' in data
+            has_size = 'w' in data and 'h' in data
+            rows.append(SQL(
+                "(%s::int, %s::int, %s::int, %s::int, %s::int, %s::varchar)",
+                int(data['id']),
+                int(data['x']) if has_position else None,
+                int(data['y']) if has_position else None,
+                int(data['w']) if has_size else None,
+                int(data['h']) if has_size else None,
+                f"{data['height']}px" if 'height' in data else None,
+            ))
+        if not rows:
+            return {'success': True, 'message': 'Layout saved successfully'}
+
+        blocks = self.browse([int(data['id']) for data in grid_data_list]).exists()
+        if not blocks:
+            return {'success': True, 'message': 'Layout saved successfully'}
+        blocks.check_access('write')
+
+        version = None
+        if action_id and layout_version is not None:
+            self.env.cr.execute("""
+                UPDATE ir_act_client SET shell_layout_version = shell_layout_version + 1
+                 WHERE id = %s AND shell_layout_version = %s
+             RETURNING shell_layout_version
+            """, (int(action_id), int(layout_version)))
+            row = self.env.cr.fetchone()
+            if not row:
+                return {
+                    'success': False,
+                    'conflict': True,
+                    'message': 'The layout was changed by another user, reload the dashboard before saving',
+                    'layout_version': self.get_layout_version(action_id),
+                }
+            version = row[0]
+            self.env['ir.actions.client'].invalidate_model(['shell_layout_version'])
+
+        layout_fields = ['data_x', 'data_y', 'grid_width', 'grid_height', 'height']
+        self.flush_model(layout_fields + ['client_action_id'])
+        # Blocks of other dashboards are left alone, whatever ids the client sent
+        action_clause = SQL("AND b.client_action_id = %s", int(action_id)) if action_id else SQL()
+        self.env.cr.execute(SQL("""
+            UPDATE dashboard_block AS b
+               SET data_x = COALESCE(v.x, b.data_x),
+                   data_y = COALESCE(v.y, b.data_y),
+                   grid_width = COALESCE(v.w, b.grid_width),
+                   grid_height = COALESCE(v.h, b.grid_height),
+                   height = COALESCE(v.height, b.height)
+              FROM (VALUES %s) AS v(id, x, y, w, h, height)
+             WHERE b.id = v.id AND b.id IN %s %s
+        """, SQL(", ").join(rows), tuple(blocks.ids), action_clause))
+        self.invalidate_model(layout_fields)
+
+        return {'success': True, 'message': 'Layout saved successfully', 'layout_version': version}
     
-    def action_refresh_data(self):
-        """Manual refresh of block data"""
+    def _refresh_values(self):
+        """Recompute the stored value of the blocks and schedule the next run"""
         self._compute_record_value()
+        self._schedule_next_refresh()
+
+    def _schedule_next_refresh(self):
+        now = fields.Datetime.now()
+        for rec in self:
+            rec._write_refresh_fields({
+                'last_refresh': now,
+                'next_refresh': now + timedelta(minutes=rec.refresh_interval) if rec.refresh_interval > 0 else False,
+            })
+
+    def _refresh_batch(self):
+        """Refresh a batch of the cron, so that a failing block cannot hold the queue
+
+        The batch runs in one savepoint, sharing the fused queries. When it
+        fails, each block runs in its own savepoint: a failing block is
+        logged, flagged stale and rescheduled anyway.
+        """
+        if len(self) > 1:
+            try:
+                with self.env.cr.savepoint():
+                    self._refresh_values()
+                return
+            except Exception as e:
+                _logger.warning("Refresh of blocks %s failed, refreshing them one by one: %s", self.ids, e)
+        for rec in self:
+            try:
+                with self.env.cr.savepoint():
+                    rec._refresh_values()
+            except Exception:
+                _logger.exception("Error refreshing block %s, rescheduling it", rec.name)
+                rec._write_refresh_fields({'value_stale': True})
+                rec._schedule_next_refresh()
+
+    @api.model
+    def _cron_refresh_values(self, batch_size=None, time_budget=None):
+        """Recompute due scheduled blocks in batches, one transaction per batch"""
+        params = self.env['ir.config_parameter'].sudo()
+        batch_size = batch_size or int(params.get_param('dashboard.refresh_batch_size', 50))
+        time_budget = time_budget or int(params.get_param('dashboard.refresh_time_budget', 240))
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        started = time.monotonic()
+
+        while True:
+            now = fields.Datetime.now()
+            # Due scheduled blocks, and blocks queued by an edit of their definition
+            blocks = self.search([
+                '|', ('next_refresh', '<=', now),
+                '&', ('refresh_interval', '>', 0), ('next_refresh', '=', False),
+            ], order='next_refresh, id', limit=batch_size)
+            if not blocks:
+                break
+
+            blocks._refresh_batch()
+            if auto_commit:
+                self.env.cr.commit()
+
+            if time.monotonic() - started >= time_budget:
+                # Leftover blocks are picked up by an immediate next run
+                self.env.ref('shell_dashboard.ir_cron_dashboard_block_refresh')._trigger()
+                break
+
+    def action_refresh_data(self):
+        """Manual refresh of block data
+
+        The blocks are handed to the background refresher instead of being
+        recomputed inside the request.
+        """
+        if self:
+            self._write_refresh_fields({'next_refresh': fields.Datetime.now()})
+            self._trigger_value_refresh()
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': 'Data Refreshed',
-                'message': 'Dashboard data has been refreshed.',
+                'title': 'Refresh Queued',
+                'message': 'The block values will be refreshed in the background shortly.',
                 'type': 'success',
                 'sticky': False,
             }
         }
+
+    def _trigger_value_refresh(self):
+        """Wake the refresh cron up, once per transaction however many blocks are queued"""
+        if self.env.cr.precommit.data.get('shell_dashboard.refresh_triggered'):
+            return
+        cron = self.env.ref('shell_dashboard.ir_cron_dashboard_block_refresh', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+            self.env.cr.precommit.data['shell_dashboard.refresh_triggered'] = True
     
     def action_duplicate_block(self):
         """Duplicate a dashboard block"""
@@ -666,8 +1963,12 @@ class DashboardBlock(models.Model):
                 'kpi': 'fa-chart-line'
             }
             vals['fa_icon'] = icon_map.get(vals.get('type'), 'fa-cube')
-        
-        return super(DashboardBlock, self).create(vals)
+
+        # The value is computed in the background, not inside this request
+        vals.setdefault('next_refresh', fields.Datetime.now())
+        block = super(DashboardBlock, self).create(vals)
+        self._trigger_value_refresh()
+        return block
     
     def write(self, vals):
         """Override write to handle field updates"""
@@ -679,5 +1980,12 @@ class DashboardBlock(models.Model):
                     vals[field] = False
             # Clear many2many fields
             self.tag_fields_ids = [(5, 0, 0)]
-        
-        return super(DashboardBlock, self).write(vals)
\ No newline at end of file
+
+        # Queue the value recompute; edits on many blocks coalesce in one cron run
+        queued = any(field in vals for field in VALUE_FIELDS)
+        if queued:
+            vals.update({'next_refresh': fields.Datetime.now(), 'last_refresh': False})
+        res = super(DashboardBlock, self).write(vals)
+        if queued:
+            self._trigger_value_refresh()
+        return res
\ No newline at end of file
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+_logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_CHUNK_SIZE = 2000
+XLSX_MAX_ROWS = 1048576
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv;charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class DashboardBlock(models.Model):
+    """Export the full data of list and chart blocks"""
+    _inherit = "dashboard.block"
+
+    # ==== EXPORT ====
+    def _check_export(self, file_format):
+        self.ensure_one()
+        if file_format not in EXPORT_FORMATS:
+            raise UserError(f"Unsupported export format: {file_format}")
+        if file_format == 'xlsx' and xlsxwriter is None:
+            raise UserError("XLSX export needs the xlsxwriter Python library")
+        if self.type not in ('list', 'graph'):
+            raise UserError("Only table and chart blocks can be exported")
+        if not self.model_name or self.model_name not in self.env:
+            raise UserError("The block has no valid model")
+        if self.type == 'graph' and not self.group_by_id:
+            raise UserError("No group by field selected for chart")
+        self.check_access('read')
+        self.env[self.model_name].check_access('read')
+
+    def _get_export_filename(self, file_format):
+        return f"{self.name or 'block'}.{file_format}"
+
+    def _iter_named_cursor(self, query):
+        """Yield the rows of ``query`` in chunks, from a server-side cursor
+
+        The cursor lives in the transaction of ``self.env.cr``, so the ORM
+        can read the records of a chunk while the next ones wait on the
+        server.
+        """
+        cursor = self.env.cr._cnx.cursor(f"shell_dashboard_export_{uuid.uuid4().hex}")
+        try:
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                yield rows, [column[0] for column in cursor.description]
+        finally:
+            cursor.close()
+
+    def _format_export_value(self, field, value):
+        if field.type == 'boolean':
+            return value
+        if value is False or value is None:
+            return ''
+        if field.type == 'many2one':
+            return value[1]
+        if field.type in ('one2many', 'many2many'):
+            return ', '.join(str(record_id) for record_id in value)
+        return value
+
+    def _iter_export_rows(self, start_date=None, end_date=None):
+        """Yield the header, then every row of the block"""
+        self.ensure_one()
+        model = self.env[self.model_name]
+        if self.type == 'list':
+            yield from self._iter_list_export(model, start_date, end_date)
+        else:
+            yield from self._iter_chart_export(model, start_date, end_date)
+
+    def _iter_list_export(self, model, start_date=None, end_date=None):
+        export_fields = [
+            model._fields[name] for name in self.tag_fields_ids.mapped('name') if name in model._fields
+        ]
+        yield [field.string for field in export_fields]
+
+        # Record rules and the date filter apply as on the dashboard, without the row limit
+        _sort_field, order = self._get_list_order(self)
+        query = model._search(self._get_block_domain(self, start_date, end_date), order=order)
+        query = self.env.cr.mogrify(*query.select(SQL.identifier(model._table, 'id'))).decode("utf-8")
+        names = [field.name for field in export_fields]
+        for rows, _columns in self._iter_named_cursor(query):
+            for values in model.browse([row[0] for row in rows]).read(names):
+                yield [self._format_export_value(field, values[field.name]) for field in export_fields]
+            # Keep the memory flat whatever the number of rows
+            self.env.invalidate_all()
+
+    def _iter_chart_export(self, model, start_date=None, end_date=None):
+        yield [self.group_by_id.field_description, self.measured_field_id.field_description or 'Value']
+
+        if not (start_date and end_date or self._get_date_bucket(self)):
+            start_date = end_date = None
+        # Every group, without the top-N cut
+        query, _bucket = self._get_chart_query(
+            self, model, self._get_block_domain(self), start_date, end_date, top_n=0
+        )
+        for rows, columns in self._iter_named_cursor(query):
+            chart = self._prepare_chart_data(self, [dict(zip(columns, row)) for row in rows])
+            yield from zip(chart['labels'], chart['datasets'][0]['data'])
+
+    def _stream_export(self, file_format, start_date=None, end_date=None):
+        """Generator of the export file content
+
+        It runs after the HTTP request cursor is closed, so it opens its
+        own cursor, with the same user and context.
+        """
+        self.ensure_one()
+        block_id = self.id
+        with self.pool.cursor() as cr:
+            block = self.with_env(self.env(cr=cr)).browse(block_id)
+            rows = block._iter_export_rows(start_date, end_date)
+            if file_format == 'csv':
+                yield from self._write_csv(rows)
+            else:
+                yield from self._write_xlsx(rows, block.name)
+
+    def _write_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    def _write_xlsx(self, rows, sheet_name):
+        """Build the workbook in a temporary file, then stream it
+
+        ``constant_memory`` flushes every row to disk once written.
+        """
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+            # Sheet names are limited to 31 characters, without []:*?/\
+            sheet = workbook.add_worksheet(''.join(c for c in (sheet_name or 'Data') if c not in '[]:*?/\\')[:31])
+            for index, row in enumerate(rows):
+                if index >= XLSX_MAX_ROWS:
+                    _logger.warning("XLSX export of %s truncated to %s rows", sheet_name, XLSX_MAX_ROWS)
+                    break
+                sheet.write_row(index, 0, row)
+            workbook.close()
+            with open(path, 'rb') as export_file:
+                while chunk := export_file.read(1024 * 1024):
+                    yield chunk
+        finally:
+            os.unlink(path)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.osv import expression
+from odoo.tools.safe_eval import safe_eval
+from .shell_query import get_top_n_query
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Block fields the materialized query is built from
+MATVIEW_FIELDS = (
+    'type', 'model_id', 'measured_field_id', 'operation', 'filter', 'group_by_id', 'date_bucket', 'materialized',
+)
+
+
+class DashboardBlock(models.Model):
+    """Serve heavy chart blocks from a PostgreSQL materialized view"""
+    _inherit = "dashboard.block"
+
+    materialized = fields.Boolean(
+        string="Materialized",
+        default=False,
+        help="Precompute the chart into a database materialized view, refreshed on the "
+             "block schedule or on demand. The view is only used without a date filter "
+             "and for users without record rules on the source model other than the "
+             "company rules, applied on the view."
+    )
+    matview_dirty = fields.Boolean(
+        string="View Rebuild Pending",
+        readonly=True,
+        copy=False,
+        help="The block definition changed: the chart is computed live until the "
+             "refresh job rebuilds the materialized view"
+    )
+
+    # ==== HELPER METHODS ====
+    def _get_matview_name(self):
+        self.ensure_one()
+        return f"shell_dashboard_mv_{self.id}"
+
+    def _matview_exists(self):
+        self.ensure_one()
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_matviews WHERE matviewname = %s",
+            (self._get_matview_name(),)
+        )
+        return bool(self.env.cr.fetchone())
+
+    def _get_matview_company_field(self, model):
+        """Company field the view is also grouped by, to apply company rules on it"""
+        field = model._fields.get('company_id')
+        return 'company_id' if field and field.type == 'many2one' and field.store else None
+
+    def _is_company_rule(self, rule, eval_context):
+        """Whether ``rule`` only keeps the records of the allowed companies
+
+        Such rules are applied by filtering the view on ``env.companies``,
+        records without company included.
+        """
+        domain = safe_eval(rule.domain_force, eval_context) if rule.domain_force else []
+        leaves = [leaf for leaf in expression.normalize_domain(domain) if expression.is_leaf(leaf)]
+        return bool(leaves) and all(
+            leaf[0] == 'company_id' and leaf[1] in ('=', 'in') for leaf in leaves
+        )
+
+    def _has_view_restricting_rules(self, model):
+        """Whether record rules other than company rules restrict the user on ``model``"""
+        Rule = self.env['ir.rule']
+        rules = Rule._get_rules(model._name, 'read')
+        if not rules:
+            return False
+        if not self._get_matview_company_field(model):
+            return True
+        eval_context = Rule._eval_context()
+        return any(not self._is_company_rule(rule, eval_context) for rule in rules)
+
+    def _can_use_matview(self, rec):
+        """The view only applies company rules: serve it to users without other rules
+
+        Until the refresh job has built the view of the current definition,
+        the chart is computed live.
+        """
+        if not (rec.materialized and rec.type == 'graph' and rec.model_name in self.env):
+            return False
+        if rec.matview_dirty or not rec._matview_exists():
+            return False
+        if self._get_date_bucket(rec):
+            # Buckets depend on the user timezone
+            return False
+        model = self.env[rec.model_name]
+        if not model.has_access('read'):
+            return False
+        return self.env.su or not self._has_view_restricting_rules(model)
+
+    # ==== VIEW LIFECYCLE ====
+    def _drop_matview(self):
+        for rec in self:
+            self.env.cr.execute(f'DROP MATERIALIZED VIEW IF EXISTS "{rec._get_matview_name()}"')
+
+    def _build_matview(self):
+        """(Re)create the materialized view of each materialized chart block
+
+        Takes an exclusive lock on the view and scans the source table:
+        only called by the refresh job, never inside a user request.
+        """
+        self._drop_matview()
+        self.filtered('matview_dirty')._write_refresh_fields({'matview_dirty': False})
+        for rec in self:
+            if not (rec.materialized and rec.type == 'graph' and rec.group_by_id
+                    and rec.model_name in self.env) or rec._get_date_bucket(rec):
+                continue
+            model = self.env[rec.model_name].sudo()
+            operation = rec.operation or 'count'
+            field_name = rec.measured_field_id.name if rec.measured_field_id else None
+            domain = self._parse_domain(rec.filter)
+            aggregates = [('value', operation, field_name, domain)]
+            company_field = self._get_matview_company_field(model)
+            if company_field and operation != 'count' and field_name:
+                # Values of each company are combined at read time, weighted by their non-NULL count
+                aggregates.append((
+                    'value__weight', 'count', None, expression.AND([domain, [(field_name, '!=', False)]]),
+                ))
+            query = model.get_fused_query(
+                aggregates,
+                group_by=rec.group_by_id,
+                extra_group_by=(company_field,) if company_field else (),
+            )
+            view = rec._get_matview_name()
+            index_columns = ", ".join(f'"{name}"' for name in (rec.group_by_id.name, company_field) if name)
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.env.cr.execute(f'CREATE MATERIALIZED VIEW "{view}" AS {query}')
+                    # REFRESH ... CONCURRENTLY needs a unique index over all rows
+                    self.env.cr.execute(
+                        f'CREATE UNIQUE INDEX "{view}_group_idx" ON "{view}" ({index_columns})'
+                    )
+            except Exception as e:
+                _logger.error("Error creating materialized view for block %s: %s", rec.name, e)
+
+    def _refresh_matview(self):
+        for rec in self.filtered('materialized'):
+            if rec.matview_dirty or not rec._matview_exists():
+                rec._build_matview()
+                continue
+            view = rec._get_matview_name()
+            try:
+                with self.env.cr.savepoint(flush=False):
+                    self.env.cr.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY "{view}"')
+            except Exception as e:
+                _logger.warning("Concurrent refresh of %s failed, rebuilding: %s", view, e)
+                rec._build_matview()
+
+    # ==== DATA ====
+    def _get_matview_chart_data(self, rec):
+        """Read the chart groups from the block materialized view
+
+        Views of multi-company models hold one row per group and company:
+        the rows of the allowed companies are combined.
+        """
+        view = rec._get_matview_name()
+        if self._get_matview_company_field(self.env[rec.model_name]):
+            group = rec.group_by_id.name
+            value = {
+                'min': "MIN(value) FILTER (WHERE value__weight > 0)",
+                'max': "MAX(value) FILTER (WHERE value__weight > 0)",
+                'avg': "SUM(value * value__weight) / NULLIF(SUM(value__weight), 0)",
+            }.get(rec.operation, "SUM(value)")
+            query = self.env.cr.mogrify(f"""
+                SELECT "{group}", COALESCE({value}, 0) AS value, SUM(value__count) AS value__count
+                  FROM "{view}"
+                 WHERE company_id IS NULL OR company_id IN %s
+              GROUP BY "{group}"
+                HAVING SUM(value__count) > 0
+            """, (tuple(self.env.companies.ids),)).decode("utf-8")
+        else:
+            query = f'SELECT * FROM "{view}" WHERE value__count > 0'
+        if rec.top_n > 0:
+            query = get_top_n_query(
+                query, rec.group_by_id.name, rec.operation, rec.top_n, rec.top_n_desc, 'value__count'
+            )
+        self.env.cr.execute(query)
+        return self._prepare_chart_data(rec, self.env.cr.dictfetchall())
+
+    def _get_block_data(self, rec, start_date=None, end_date=None, fused=None):
+        if fused is None and not (start_date and end_date) and self._can_use_matview(rec):
+            try:
+                return self._get_matview_chart_data(rec)
+            except Exception as e:
+                _logger.error("Error reading materialized view of block %s: %s", rec.name, e)
+        return super()._get_block_data(rec, start_date, end_date, fused)
+
+    def _get_fused_chart_data(self, start_date=None, end_date=None):
+        blocks = self
+        if not (start_date and end_date):
+            blocks = self.filtered(lambda b: not self._can_use_matview(b))
+        return super(DashboardBlock, blocks)._get_fused_chart_data(start_date, end_date)
+
+    def _refresh_values(self):
+        super()._refresh_values()
+        self._refresh_matview()
+
+    def _queue_matview_refresh(self, rebuild=False):
+        """Hand the views to the refresh job, which builds them outside of the request"""
+        if not self:
+            return
+        vals = {'next_refresh': fields.Datetime.now(), 'last_refresh': False}
+        if rebuild:
+            vals['matview_dirty'] = True
+        self._write_refresh_fields(vals)
+        self._trigger_value_refresh()
+
+    # ==== ACTIONS ====
+    def action_refresh_matview(self):
+        """Refresh the materialized view on demand, in the background"""
+        self.filtered('materialized')._queue_matview_refresh()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Materialized View Refresh Queued',
+                'message': 'The precomputed chart data will be refreshed in the background shortly.',
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    # ==== CRUD ====
+    @api.model
+    def create(self, vals):
+        if vals.get('materialized'):
+            # Built by the refresh job the block is queued for on creation
+            vals = dict(vals, matview_dirty=True)
+        return super().create(vals)
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(field in vals for field in MATVIEW_FIELDS):
+            self.filtered('materialized')._queue_matview_refresh(rebuild=True)
+            # Dropping is cheap: it neither scans nor waits on the source table
+            self.filtered(lambda b: not b.materialized)._drop_matview()
+        return res
+
+    def unlink(self):
+        self._drop_matview()
+        return super().unlink()
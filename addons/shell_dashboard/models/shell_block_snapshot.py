@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from datetime import timedelta
+from odoo import api, fields, models
+from odoo.tools import date_utils
+import logging
+
+_logger = logging.getLogger(__name__)
+
+PERIODS = [('day', 'Day'), ('week', 'Week'), ('month', 'Month'), ('year', 'Year')]
+
+
+class DashboardBlockSnapshot(models.Model):
+    """Historical values of tile/KPI blocks, one row per block and period"""
+    _name = "dashboard.block.snapshot"
+    _description = "Dashboard Block Snapshot"
+    _order = "block_id, date desc"
+
+    block_id = fields.Many2one(
+        'dashboard.block',
+        string="Block",
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    period = fields.Selection(PERIODS, string="Period", required=True)
+    date = fields.Date(string="Period Start", required=True, help="First day of the period")
+    value = fields.Float(string="Value", digits=(16, 2))
+    source_date = fields.Date(
+        string="Source Date",
+        readonly=True,
+        help="Day the value was taken, a newer value of the period replaces it"
+    )
+
+    _sql_constraints = [
+        ('block_period_date_unique', 'unique(block_id, period, date)',
+         'Only one snapshot per block and period is allowed.')
+    ]
+
+    # ==== SNAPSHOT JOB ====
+    @api.model
+    def _cron_take_snapshots(self):
+        """Store the current value of every tile/KPI block, then compact and purge"""
+        today = fields.Date.context_today(self)
+        blocks = self.env['dashboard.block'].search([('type', 'in', ['tile', 'kpi'])])
+        # Only scheduled blocks are recomputed by the refresh job: evaluate the others now
+        blocks.filtered(
+            lambda b: not b.last_refresh or b.last_refresh.date() < today
+        )._compute_record_value()
+        for block in blocks:
+            period = block.trend_period or 'month'
+            # The row of the running period is overwritten until it closes
+            self.env.cr.execute("""
+                INSERT INTO dashboard_block_snapshot
+                    (block_id, period, date, value, source_date, create_uid, create_date, write_uid, write_date)
+                VALUES (%s, %s, %s, %s, %s, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+                ON CONFLICT (block_id, period, date)
+                DO UPDATE SET value = EXCLUDED.value, source_date = EXCLUDED.source_date,
+                              write_date = EXCLUDED.write_date
+            """, (
+                block.id, period, date_utils.start_of(today, period),
+                block.record_value, today, self.env.uid, self.env.uid,
+            ))
+        self._compact_snapshots(today)
+        self._purge_snapshots(today)
+        self.env.invalidate_all()
+
+    @api.model
+    def _compact_snapshots(self, today):
+        """Roll daily and weekly rows older than N days up into monthly rows
+
+        The monthly row keeps the last value of the month, like the monthly
+        rows written directly by the snapshot job. The limit moves one day
+        per run, so a month is rolled up over several runs: a row only
+        replaces the monthly value when it was taken later.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        compact_days = int(params.get_param('dashboard.snapshot_compact_days', 90))
+        limit_date = today - timedelta(days=compact_days)
+        self.env.cr.execute("""
+            INSERT INTO dashboard_block_snapshot
+                (block_id, period, date, value, source_date, create_uid, create_date, write_uid, write_date)
+            SELECT DISTINCT ON (block_id, date_trunc('month', date))
+                   block_id, 'month', date_trunc('month', date)::date, value, COALESCE(source_date, date),
+                   %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+              FROM dashboard_block_snapshot
+             WHERE period IN ('day', 'week') AND date < %s
+          ORDER BY block_id, date_trunc('month', date), date DESC
+            ON CONFLICT (block_id, period, date)
+            DO UPDATE SET value = EXCLUDED.value, source_date = EXCLUDED.source_date,
+                          write_date = EXCLUDED.write_date
+                    WHERE dashboard_block_snapshot.source_date IS NULL
+                       OR dashboard_block_snapshot.source_date < EXCLUDED.source_date
+        """, (self.env.uid, self.env.uid, limit_date))
+        self.env.cr.execute("""
+            DELETE FROM dashboard_block_snapshot
+             WHERE period IN ('day', 'week') AND date < %s
+        """, (limit_date,))
+
+    @api.model
+    def _purge_snapshots(self, today):
+        """Delete snapshots older than the retention period"""
+        params = self.env['ir.config_parameter'].sudo()
+        retention_days = int(params.get_param('dashboard.snapshot_retention_days', 730))
+        self.env.cr.execute(
+            "DELETE FROM dashboard_block_snapshot WHERE date < %s",
+            (today - timedelta(days=retention_days),)
+        )
+
+    # ==== READ HELPERS ====
+    @api.model
+    def _get_series(self, blocks, size=12):
+        """Return ``{block_id: [(date, value), ...]}`` oldest first
+
+        Only closed periods of each block's ``trend_period`` are returned,
+        the running period is represented by the block current value.
+        """
+        series = defaultdict(list)
+        if not blocks:
+            return series
+        today = fields.Date.context_today(self)
+        period_starts = {
+            block.id: date_utils.start_of(today, block.trend_period or 'month')
+            for block in blocks
+        }
+        self.env.cr.execute("""
+            SELECT block_id, date, value
+              FROM (
+                SELECT s.block_id, s.date, s.value,
+                       row_number() OVER (PARTITION BY s.block_id ORDER BY s.date DESC) AS rn
+                  FROM dashboard_block_snapshot s
+                  JOIN dashboard_block b ON b.id = s.block_id
+                                        AND s.period = COALESCE(b.trend_period, 'month')
+                 WHERE s.block_id IN %s
+              ) ranked
+             WHERE rn <= %s
+          ORDER BY block_id, date
+        """, (tuple(blocks.ids), size + 1))
+        for block_id, date, value in self.env.cr.fetchall():
+            if date < period_starts[block_id]:
+                series[block_id].append((date, value))
+        for block_id in series:
+            series[block_id] = series[block_id][-size:]
+        return series
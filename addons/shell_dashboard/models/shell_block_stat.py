@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import timedelta
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Samples kept in memory per database until a request flushes them
+MAX_PENDING_SAMPLES = 5000
+# Dashboard reads store the samples of the process once this many are pending,
+# or once the last store is this many seconds old
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 60
+
+_pending_samples = defaultdict(lambda: deque(maxlen=MAX_PENDING_SAMPLES))
+_last_flush = {}
+_pending_lock = threading.Lock()
+
+
+@contextmanager
+def measure():
+    """Measure wall time, SQL time and query count of the enclosed block
+
+    SQL figures come from the per-thread counters maintained by Odoo
+    cursors; they are initialized on threads that have none (e.g. the
+    parallel evaluation pool).
+    """
+    thread = threading.current_thread()
+    if not hasattr(thread, 'query_count'):
+        thread.query_count = 0
+        thread.query_time = 0
+    sample = {}
+    started = time.perf_counter()
+    query_count, query_time = thread.query_count, thread.query_time
+    try:
+        yield sample
+    finally:
+        sample['wall_time'] = (time.perf_counter() - started) * 1000
+        sample['sql_time'] = (thread.query_time - query_time) * 1000
+        sample['query_count'] = thread.query_count - query_count
+
+
+def record_sample(dbname, sample):
+    with _pending_lock:
+        _pending_samples[dbname].append(sample)
+
+
+def pop_samples(dbname, force=True):
+    """Pending samples of ``dbname``, only when due to be stored unless ``force``"""
+    now = time.monotonic()
+    with _pending_lock:
+        pending = _pending_samples[dbname]
+        if not force and len(pending) < FLUSH_SIZE and now - _last_flush.get(dbname, now) < FLUSH_INTERVAL:
+            _last_flush.setdefault(dbname, now)
+            return []
+        samples = list(pending)
+        pending.clear()
+        _last_flush[dbname] = now
+    return samples
+
+
+class DashboardBlockStat(models.Model):
+    """One evaluation of a block: timings, size and cache outcome"""
+    _name = "dashboard.block.stat"
+    _description = "Dashboard Block Execution"
+    _order = "date desc"
+    _log_access = False
+
+    block_id = fields.Many2one(
+        'dashboard.block',
+        string="Block",
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    date = fields.Datetime(string="Date", required=True, index=True)
+    source = fields.Selection([
+        ('dashboard', 'Dashboard'),
+        ('compute', 'Value Compute'),
+    ], string="Source", required=True)
+    wall_time = fields.Float(string="Wall Time (ms)", digits=(16, 2))
+    sql_time = fields.Float(string="SQL Time (ms)", digits=(16, 2))
+    query_count = fields.Integer(string="Queries")
+    row_count = fields.Integer(string="Rows")
+    cache_hit = fields.Boolean(string="Cache Hit")
+    weight = fields.Integer(string="Weight", default=1, help="Evaluations the sample stands for")
+    query = fields.Text(string="SQL", help="Generated SQL, kept for slow evaluations")
+
+    # ==== STORE ====
+    @api.model
+    def _flush_samples(self, force=True):
+        """Insert the samples collected by this process in one statement
+
+        Without ``force``, the samples are kept in memory until enough of
+        them are pending, so most dashboard reads do not write.
+        """
+        samples = pop_samples(self.env.cr.dbname, force)
+        if not samples:
+            return
+        now = fields.Datetime.now()
+        rows = [
+            SQL(
+                "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                sample['block_id'], sample.get('date') or now, sample['source'],
+                sample.get('wall_time', 0.0), sample.get('sql_time', 0.0),
+                sample.get('query_count', 0), sample.get('row_count', 0),
+                bool(sample.get('cache_hit')), sample.get('weight', 1), sample.get('query'),
+            )
+            for sample in samples
+        ]
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(SQL("""
+                    INSERT INTO dashboard_block_stat
+                        (block_id, date, source, wall_time, sql_time, query_count, row_count, cache_hit, weight, query)
+                    SELECT v.block_id, v.date, v.source, v.wall_time, v.sql_time,
+                           v.query_count, v.row_count, v.cache_hit, v.weight, v.query
+                      FROM (VALUES %s) AS v(block_id, date, source, wall_time, sql_time,
+                                           query_count, row_count, cache_hit, weight, query)
+                      JOIN dashboard_block b ON b.id = v.block_id
+                """, SQL(", ").join(rows)))
+        except Exception as e:
+            _logger.error("Error storing dashboard block telemetry: %s", e)
+
+    @api.model
+    def _cron_purge_stats(self):
+        """Keep the last ``dashboard.stat_retention_days`` days of samples"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param('dashboard.stat_retention_days', 7))
+        self.env.cr.execute(
+            "DELETE FROM dashboard_block_stat WHERE date < %s",
+            (fields.Datetime.now() - timedelta(days=days),)
+        )
+
+
+class DashboardBlockStatReport(models.Model):
+    """Rolling latency statistics per block, over the retained samples"""
+    _name = "dashboard.block.stat.report"
+    _description = "Dashboard Block Performance"
+    _auto = False
+    _order = "total_time desc"
+
+    block_id = fields.Many2one('dashboard.block', string="Block", readonly=True)
+    block_type = fields.Char(string="Type", readonly=True)
+    calls = fields.Integer(string="Calls", readonly=True)
+    cache_hit_ratio = fields.Float(string="Cache Hits (%)", digits=(16, 1), readonly=True)
+    p50_time = fields.Float(string="p50 (ms)", digits=(16, 2), readonly=True)
+    p95_time = fields.Float(string="p95 (ms)", digits=(16, 2), readonly=True)
+    avg_sql_time = fields.Float(string="Avg SQL (ms)", digits=(16, 2), readonly=True)
+    avg_query_count = fields.Float(string="Avg Queries", digits=(16, 1), readonly=True)
+    avg_row_count = fields.Float(string="Avg Rows", digits=(16, 1), readonly=True)
+    total_time = fields.Float(string="Total Time (ms)", digits=(16, 0), readonly=True,
+                              help="Time spent evaluating the block over the period: its cost")
+    last_date = fields.Datetime(string="Last Evaluation", readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT s.block_id AS id,
+                       s.block_id,
+                       b.type AS block_type,
+                       sum(s.weight) AS calls,
+                       100.0 * COALESCE(sum(s.weight) FILTER (WHERE s.cache_hit), 0) / sum(s.weight)
+                           AS cache_hit_ratio,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY s.wall_time)
+                           FILTER (WHERE NOT s.cache_hit) AS p50_time,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY s.wall_time)
+                           FILTER (WHERE NOT s.cache_hit) AS p95_time,
+                       avg(s.sql_time) FILTER (WHERE NOT s.cache_hit) AS avg_sql_time,
+                       avg(s.query_count) FILTER (WHERE NOT s.cache_hit) AS avg_query_count,
+                       avg(s.row_count) AS avg_row_count,
+                       sum(s.wall_time * s.weight) AS total_time,
+                       max(s.date) AS last_date
+                  FROM dashboard_block_stat s
+                  JOIN dashboard_block b ON b.id = s.block_id
+              GROUP BY s.block_id, b.type
+            )
+        """)
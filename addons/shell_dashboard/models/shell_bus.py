@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from odoo import api, models, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'shell_dashboard_'
+NOTIFICATION_TYPE = 'shell_dashboard/blocks_changed'
+
+# Block fields written by the refresher, they do not change what clients show
+REFRESH_FIELDS = {
+    'last_refresh', 'next_refresh', 'record_value', 'value_stale', 'last_update', 'source_version', 'matview_dirty',
+}
+
+# Block fields the live models are read from
+LIVE_MODEL_FIELDS = {'model_id', 'model_name', 'active'}
+
+DASHBOARD_GROUPS = (
+    'shell_dashboard.group_dashboard_user',
+    'shell_dashboard.group_dashboard_manager',
+    'shell_dashboard.group_dashboard_admin',
+)
+
+
+def get_dashboard_channel(action_id):
+    """Bus channel of the dashboard of client action ``action_id``"""
+    return f"{CHANNEL_PREFIX}{action_id}"
+
+
+class DashboardBlock(models.Model):
+    """Tell open dashboards which blocks changed through the bus"""
+    _inherit = "dashboard.block"
+
+    # ==== LIVE UPDATES ====
+    @tools.ormcache()
+    def _get_live_models(self):
+        """Source models of active blocks, whose changes are tracked and pushed"""
+        return self._read_live_models()
+
+    def _read_live_models(self):
+        self.env.cr.execute(
+            "SELECT DISTINCT model_name FROM dashboard_block WHERE active AND model_name IS NOT NULL"
+        )
+        return frozenset(model_name for model_name, in self.env.cr.fetchall())
+
+    def _update_live_models(self):
+        """Clear the cached live models, only when the blocks changed them
+
+        Clearing empties the whole ormcache of every worker, so block edits
+        that keep the same source models leave it alone.
+        """
+        self.flush_model(['model_name', 'active'])
+        if self._read_live_models() != self._get_live_models():
+            self.env.registry.clear_cache()
+
+    def _notify_blocks_changed(self, config=False):
+        """Publish the changed block ids on the channel of their dashboard
+
+        Only ids are sent: the data depends on the access of each user, so
+        clients fetch it back, sharing the block cache.
+        """
+        blocks_by_action = {}
+        for rec in self:
+            if rec.client_action_id:
+                blocks_by_action.setdefault(rec.client_action_id.id, []).append(rec.id)
+        for action_id, block_ids in blocks_by_action.items():
+            self.env['bus.bus']._sendone(get_dashboard_channel(action_id), NOTIFICATION_TYPE, {
+                'action_id': action_id,
+                'block_ids': block_ids,
+                'config': config,
+            })
+
+    def _notify_dashboards_changed(self, action_ids):
+        """Ask the dashboards ``action_ids`` to reload their layout"""
+        for action_id in action_ids:
+            self.env['bus.bus']._sendone(get_dashboard_channel(action_id), NOTIFICATION_TYPE, {
+                'action_id': action_id,
+                'block_ids': [],
+                'config': True,
+            })
+
+    @api.model
+    def _notify_changed_models(self, model_names):
+        """Notify the blocks reading ``model_names``, written by the committing transaction"""
+        try:
+            blocks = self.sudo().search([('model_name', 'in', list(model_names))])
+            blocks._notify_blocks_changed()
+        except Exception as e:
+            _logger.error("Error publishing dashboard updates: %s", e)
+
+    def _refresh_values(self):
+        super()._refresh_values()
+        self._notify_blocks_changed()
+
+    @api.model
+    def get_save_layout(self, grid_data_list, action_id=None, layout_version=None):
+        res = super().get_save_layout(grid_data_list, action_id, layout_version)
+        # The bulk update bypasses write(): tell the other open tabs
+        if res.get('success') and action_id:
+            self._notify_dashboards_changed([int(action_id)])
+        return res
+
+    # ==== CRUD ====
+    @api.model
+    def create(self, vals):
+        block = super().create(vals)
+        block._update_live_models()
+        block._notify_blocks_changed(config=True)
+        return block
+
+    def write(self, vals):
+        if set(vals) <= REFRESH_FIELDS:
+            return super().write(vals)
+        previous_actions = set(self.client_action_id.ids)
+        res = super().write(vals)
+        if LIVE_MODEL_FIELDS.intersection(vals):
+            self._update_live_models()
+        self._notify_blocks_changed(config=True)
+        # Blocks moved to another dashboard leave the previous one too
+        self._notify_dashboards_changed(previous_actions - set(self.client_action_id.ids))
+        return res
+
+    def unlink(self):
+        action_ids = set(self.client_action_id.ids)
+        res = super().unlink()
+        self.browse()._update_live_models()
+        self._notify_dashboards_changed(action_ids)
+        return res
+
+
+class IrWebsocket(models.AbstractModel):
+    """Only dashboard users may subscribe to dashboard channels"""
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        if not any(self.env.user.has_group(group) for group in DASHBOARD_GROUPS):
+            channels = [
+                channel for channel in channels
+                if not (isinstance(channel, str) and channel.startswith(CHANNEL_PREFIX))
+            ]
+        return super()._build_bus_channel_list(channels)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict, defaultdict
+import copy
+import json
+import threading
+import time
+
+from odoo import api, models
+from odoo.tools import json_default
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class BlockCache:
+    """In-process LRU cache of block results for one database
+
+    Every entry has its own TTL and remembers the model it was computed
+    from, so writes on that model expire it. The total size of the cached
+    values is kept under ``max_bytes`` by evicting the least recently used
+    entries first.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._keys_by_model = defaultdict(set)
+        self._versions = {}
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on miss or expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[3])
+
+    def get_stale(self, key):
+        """Return a copy of the last stored value, even expired or invalidated
+
+        Expired entries are kept until evicted so a block whose query fails
+        can still show its last good result.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return copy.deepcopy(entry[3])
+
+    def set(self, key, value, ttl, model_name):
+        """Store ``value`` for ``ttl`` seconds, evicting LRU entries if needed
+
+        With ``ttl <= 0`` the value is only kept as a stale fallback.
+        """
+        size = len(json.dumps(value, default=json_default))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, model_name, copy.deepcopy(value))
+            self._keys_by_model[model_name].add(key)
+            self.size += size
+            while self.size > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_model(self, model_name):
+        """Expire every entry computed from ``model_name``"""
+        if model_name not in self._keys_by_model:
+            return
+        with self._lock:
+            for key in self._keys_by_model.get(model_name, ()):
+                _expires_at, size, entry_model, value = self._entries[key]
+                self._entries[key] = (0, size, entry_model, value)
+
+    def sync_version(self, model_name, version):
+        """Expire the entries of ``model_name`` when its change counter moved
+
+        The counter is bumped by every worker, so this catches the writes
+        made by other processes, which the write hooks cannot see.
+        """
+        if self._versions.get(model_name) == version:
+            return
+        self._versions[model_name] = version
+        self.invalidate_model(model_name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_model.clear()
+            self.size = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'max_size': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _pop(self, key):
+        _expires_at, size, model_name, _value = self._entries.pop(key)
+        self.size -= size
+        keys = self._keys_by_model.get(model_name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_model[model_name]
+
+
+_block_caches = {}
+_block_caches_lock = threading.Lock()
+
+
+def get_block_cache(dbname):
+    """Return the block cache of database ``dbname``"""
+    cache = _block_caches.get(dbname)
+    if cache is None:
+        with _block_caches_lock:
+            cache = _block_caches.setdefault(dbname, BlockCache())
+    return cache
+
+
+class Base(models.AbstractModel):
+    """Invalidate cached dashboard results when a source model is written"""
+    _inherit = 'base'
+
+    def _invalidate_dashboard_cache(self):
+        get_block_cache(self.env.cr.dbname).invalidate_model(self._name)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._invalidate_dashboard_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._invalidate_dashboard_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._invalidate_dashboard_cache()
+        return res
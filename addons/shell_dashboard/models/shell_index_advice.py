@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from odoo import api, fields, models, sql_db
+from odoo.exceptions import AccessError, UserError
+from odoo.tools import SQL
+import hashlib
+import logging
+import re
+
+_logger = logging.getLogger(__name__)
+
+# Equality of a column with a literal, as printed by EXPLAIN
+EQUALITY_RE = re.compile(
+    r"\(?(\w+)\)?(?:::[a-z ]+)?\s*=\s*('(?:[^']|'')*'|true|false|-?\d+(?:\.\d+)?)(?:::[a-z ]+)?\)*$"
+)
+IDENTIFIER_RE = re.compile(r"\b([a-z_][a-z0-9_]*)\b")
+# Condition of a partial index predicate, as stored on the advice
+PREDICATE_RE = re.compile(r"""^"([a-z_][a-z0-9_]*)" = ('(?:[^']|'')*'|true|false|-?\d+(?:\.\d+)?)$""")
+INDEX_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+# Columns whose equality predicate is selective enough to become a partial index
+MAX_PARTIAL_DISTINCT = 20
+# Physical/logical order correlation above which a range column gets a BRIN index
+MIN_BRIN_CORRELATION = 0.9
+# Statement timeout (ms) of a benchmark when no dashboard timeout is configured
+DEFAULT_BENCHMARK_TIMEOUT = 30000
+
+
+def _parse_literal(value):
+    """Python value of a literal matched by ``PREDICATE_RE``, to pass as a query parameter"""
+    if value in ('true', 'false'):
+        return value == 'true'
+    if value.startswith("'"):
+        return value[1:-1].replace("''", "'")
+    return float(value) if '.' in value else int(value)
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _walk_plan(child)
+
+
+class DashboardIndexAdvice(models.Model):
+    """Index suggested by EXPLAIN-ing the SQL of a dashboard block"""
+    _name = "dashboard.index.advice"
+    _description = "Dashboard Index Advice"
+    _order = "estimated_benefit desc, id"
+
+    block_id = fields.Many2one(
+        'dashboard.block',
+        string="Block",
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    table_name = fields.Char(string="Table", required=True, readonly=True)
+    column_names = fields.Char(string="Columns", required=True, readonly=True)
+    index_type = fields.Selection([
+        ('btree', 'B-tree'),
+        ('partial', 'Partial B-tree'),
+        ('brin', 'BRIN'),
+    ], string="Index Type", required=True, readonly=True)
+    predicate = fields.Char(string="Partial Predicate", readonly=True)
+    index_name = fields.Char(string="Index Name", required=True, readonly=True)
+    definition = fields.Text(
+        string="Definition",
+        required=True,
+        readonly=True,
+        help="Shown for review only: the statement is rebuilt from the table, columns and predicate"
+    )
+    reason = fields.Char(string="Reason", help="Plan node the index would replace")
+    table_rows = fields.Float(string="Table Rows", help="Planner estimate of the table size")
+    plan_cost = fields.Float(string="Plan Cost", help="Estimated cost of the whole block query")
+    estimated_benefit = fields.Float(
+        string="Estimated Benefit",
+        help="Plan cost expected to be saved: cost of the scan or sort, minus the part "
+             "that still has to read the matching rows"
+    )
+    duration_before = fields.Float(string="Duration Before (ms)", digits=(16, 2))
+    duration_after = fields.Float(string="Duration After (ms)", digits=(16, 2))
+    state = fields.Selection([
+        ('proposed', 'Proposed'),
+        ('created', 'Created'),
+        ('failed', 'Failed'),
+    ], string="Status", default='proposed', required=True)
+    error = fields.Text(string="Error", readonly=True)
+
+    # ==== ANALYSIS ====
+    @api.model
+    def _advise_blocks(self, blocks):
+        """Replace the proposed advices of ``blocks`` by a fresh analysis"""
+        self.search([('block_id', 'in', blocks.ids), ('state', '!=', 'created')]).unlink()
+        min_rows = int(self.env['ir.config_parameter'].sudo().get_param('dashboard.index_advice_min_rows', 10000))
+        today = fields.Date.context_today(self)
+        # Plans are made with a typical date filter of the dashboard
+        start_date, end_date = str(today - timedelta(days=30)), str(today)
+
+        advices = self.browse()
+        for block in blocks:
+            try:
+                sql = block._get_block_sql(block, start_date, end_date)
+                if not sql:
+                    continue
+                plan = self._explain(sql)
+                duration = self._benchmark(block, sql)
+            except Exception as e:
+                _logger.error("Error analyzing block %s for indexes: %s", block.name, e)
+                continue
+            for vals in self._suggest_indexes(plan, min_rows):
+                if advices.filtered(lambda a: a.block_id == block and a.index_name == vals['index_name']):
+                    continue
+                vals.update({'block_id': block.id, 'duration_before': duration})
+                advices |= self.create(vals)
+        return advices
+
+    def _explain(self, sql):
+        self.env.cr.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        return self.env.cr.fetchone()[0][0]['Plan']
+
+    @api.model
+    def _benchmark(self, block, sql):
+        """Execution time (ms) of ``sql`` under the block timeout, None if it timed out
+
+        EXPLAIN ANALYZE runs the query for real: without a configured
+        timeout, ``DEFAULT_BENCHMARK_TIMEOUT`` bounds it.
+        """
+        cr = self.env.cr
+        timeout_ms = block._get_statement_timeout(block) or DEFAULT_BENCHMARK_TIMEOUT
+        try:
+            with block._statement_timeout(cr, timeout_ms), cr.savepoint(flush=False):
+                cr.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+                return cr.fetchone()[0][0]['Execution Time']
+        except Exception as e:
+            _logger.warning("Benchmark of block %s failed: %s", block.name, e)
+            return None
+
+    def _suggest_indexes(self, plan, min_rows):
+        """Index suggestions for the sequential scans and sorts of ``plan``"""
+        suggestions = []
+        for node in _walk_plan(plan):
+            if node['Node Type'] == 'Seq Scan' and node.get('Filter'):
+                vals = self._suggest_scan_index(node, plan, min_rows)
+            elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+                vals = self._suggest_sort_index(node, plan, min_rows)
+            else:
+                vals = None
+            if vals:
+                suggestions.append(vals)
+        return suggestions
+
+    def _suggest_scan_index(self, node, plan, min_rows):
+        table = node['Relation Name']
+        table_rows = self._get_table_rows(table)
+        if table_rows < min_rows:
+            return None
+        columns, stats = self._get_columns(table), self._get_column_stats(table)
+
+        equalities, ranges = [], []
+        for cond in node['Filter'].split(' AND '):
+            cond = cond.strip()
+            referenced = [name for name in IDENTIFIER_RE.findall(cond) if name in columns]
+            if len(set(referenced)) != 1:
+                continue
+            column = referenced[0]
+            match = EQUALITY_RE.search(cond)
+            if match and match.group(1) == column:
+                equalities.append((column, match.group(2)))
+            elif cond.strip('()') == column:
+                # Bare boolean column, e.g. the ``active`` filter
+                equalities.append((column, 'true'))
+            elif column not in ranges:
+                ranges.append(column)
+
+        # Selective constants go in a partial index predicate
+        predicate = [
+            (column, value) for column, value in equalities
+            if 0 < stats.get(column, (0, 0))[0] <= MAX_PARTIAL_DISTINCT and ranges
+        ]
+        index_columns = [column for column, _value in equalities if (column, _value) not in predicate]
+        index_columns += ranges
+        index_columns = list(dict.fromkeys(index_columns))[:3]
+        if not index_columns:
+            return None
+
+        if (not predicate and len(index_columns) == 1 and index_columns[0] in ranges
+                and abs(stats.get(index_columns[0], (0, 0))[1]) >= MIN_BRIN_CORRELATION):
+            index_type = 'brin'
+        else:
+            index_type = 'partial' if predicate else 'btree'
+        if not predicate and index_columns[0] in self._get_indexed_columns(table):
+            return None
+
+        selectivity = min(node['Plan Rows'] / table_rows, 1.0) if table_rows else 1.0
+        return self._prepare_advice(
+            table, index_columns, index_type, predicate, table_rows, plan,
+            benefit=node['Total Cost'] * (1 - selectivity),
+            reason=f"Sequential scan of {table} ({table_rows:,.0f} rows) filtering on {node['Filter']}",
+        )
+
+    def _suggest_sort_index(self, node, plan, min_rows):
+        if node['Plan Rows'] < min_rows or not node.get('Sort Key'):
+            return None
+        tables = {key.split('.')[0] for key in node['Sort Key'] if '.' in key}
+        if len(tables) != 1:
+            return None
+        table = tables.pop()
+        columns = self._get_columns(table)
+        index_columns = [
+            key.split('.')[1].split()[0] for key in node['Sort Key']
+        ]
+        if not all(column in columns for column in index_columns):
+            return None
+        if index_columns[0] in self._get_indexed_columns(table):
+            return None
+        child_cost = sum(child['Total Cost'] for child in node.get('Plans', []))
+        return self._prepare_advice(
+            table, index_columns, 'btree', [], self._get_table_rows(table), plan,
+            benefit=node['Total Cost'] - child_cost,
+            reason=f"Sort of {node['Plan Rows']:,.0f} rows on {', '.join(node['Sort Key'])}",
+        )
+
+    def _get_index_name(self, table, index_columns, predicate_columns):
+        suffix = "_".join(index_columns)
+        if predicate_columns:
+            suffix += "_where_" + "_".join(predicate_columns)
+        index_name = f"{table}_dash_{suffix}_idx"
+        if len(index_name) > 63:
+            index_name = f"{table[:40]}_dash_{hashlib.sha1(index_name.encode()).hexdigest()[:8]}_idx"
+        return index_name
+
+    def _prepare_advice(self, table, index_columns, index_type, predicate, table_rows, plan, benefit, reason):
+        index_name = self._get_index_name(table, index_columns, [column for column, _value in predicate])
+        columns_sql = ", ".join(f'"{column}"' for column in index_columns)
+        definition = (
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}" ON "{table}" '
+            f'USING {"brin" if index_type == "brin" else "btree"} ({columns_sql})'
+        )
+        predicate_sql = " AND ".join(f'"{column}" = {value}' for column, value in predicate)
+        if predicate_sql:
+            definition += f" WHERE {predicate_sql}"
+        return {
+            'table_name': table,
+            'column_names': ", ".join(index_columns),
+            'index_type': index_type,
+            'predicate': predicate_sql or False,
+            'index_name': index_name,
+            'definition': definition,
+            'reason': reason[:250],
+            'table_rows': table_rows,
+            'plan_cost': plan['Total Cost'],
+            'estimated_benefit': max(benefit, 0.0),
+        }
+
+    # ==== CATALOG HELPERS ====
+    def _get_table_rows(self, table):
+        self.env.cr.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", (table,))
+        row = self.env.cr.fetchone()
+        return max(row[0], 0) if row else 0
+
+    def _get_columns(self, table):
+        self.env.cr.execute("""
+            SELECT attname FROM pg_attribute
+             WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        """, (table,))
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    def _get_column_stats(self, table):
+        """``{column: (n_distinct, correlation)}`` from the planner statistics"""
+        self.env.cr.execute("""
+            SELECT attname, n_distinct, COALESCE(correlation, 0)
+              FROM pg_stats
+             WHERE schemaname = current_schema() AND tablename = %s
+        """, (table,))
+        return {name: (n_distinct, correlation) for name, n_distinct, correlation in self.env.cr.fetchall()}
+
+    def _get_indexed_columns(self, table):
+        """Leading column of every valid index of ``table``"""
+        self.env.cr.execute("""
+            SELECT a.attname
+              FROM pg_index i
+              JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+             WHERE i.indrelid = %s::regclass AND i.indisvalid AND i.indpred IS NULL
+        """, (table,))
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    def _get_index_sql(self):
+        """``(create, drop)`` statements of the advice, rebuilt from its validated fields
+
+        The stored definition is never executed: the table, the columns and
+        the predicate must exist, and the index name must be the one the
+        advisor gives them, so only indexes of the advisor can be dropped.
+        """
+        self.ensure_one()
+        table = self.table_name or ''
+        self.env.cr.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+        row = self.env.cr.fetchone()
+        if not INDEX_NAME_RE.match(table) or not row or row[0] != 'r':
+            raise UserError(f"Unknown table {table}")
+        known_columns = self._get_columns(table)
+
+        index_columns = [column.strip() for column in (self.column_names or '').split(',')]
+        unknown = [column for column in index_columns if column not in known_columns]
+        if unknown:
+            raise UserError(f"Unknown columns of {table}: {', '.join(unknown)}")
+        predicate = []
+        for cond in self.predicate.split(' AND ') if self.predicate else []:
+            match = PREDICATE_RE.match(cond.strip())
+            if not match or match.group(1) not in known_columns:
+                raise UserError(f"Invalid index predicate: {cond}")
+            predicate.append((match.group(1), _parse_literal(match.group(2))))
+        if self.index_type not in ('btree', 'partial', 'brin') or bool(predicate) != (self.index_type == 'partial'):
+            raise UserError(f"Invalid index type: {self.index_type}")
+
+        index_name = self.index_name or ''
+        expected_name = self._get_index_name(table, index_columns, [column for column, _value in predicate])
+        if not INDEX_NAME_RE.match(index_name) or index_name != expected_name:
+            raise UserError(f"Invalid index name {index_name}, expected {expected_name}")
+
+        create = SQL(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON %s USING %s (%s)",
+            SQL.identifier(index_name),
+            SQL.identifier(table),
+            SQL("brin" if self.index_type == 'brin' else "btree"),
+            SQL(", ").join(SQL.identifier(column) for column in index_columns),
+        )
+        if predicate:
+            create = SQL("%s WHERE %s", create, SQL(" AND ").join(
+                SQL("%s = %s", SQL.identifier(column), value) for column, value in predicate
+            ))
+        return create, SQL("DROP INDEX CONCURRENTLY IF EXISTS %s", SQL.identifier(index_name))
+
+    # ==== ACTIONS ====
+    def _check_admin(self):
+        # Index DDL runs outside of any transaction, on every table of the database
+        if not self.env.user.has_group('base.group_system'):
+            raise AccessError("Only system administrators can create or drop indexes.")
+
+    def action_create_index(self):
+        """Create the suggested indexes without locking writes, then re-benchmark"""
+        self._check_admin()
+        for advice in self.filtered(lambda a: a.state != 'created'):
+            try:
+                create_sql, drop_sql = advice._get_index_sql()
+            except UserError as e:
+                _logger.warning("Refused index advice %s: %s", advice.id, e)
+                advice.write({'state': 'failed', 'error': str(e)})
+                continue
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            cr = sql_db.db_connect(self.env.cr.dbname).cursor()
+            try:
+                cr._cnx.autocommit = True
+                cr.execute(create_sql)
+                advice.write({'state': 'created', 'error': False})
+            except Exception as e:
+                _logger.error("Error creating index %s: %s", advice.index_name, e)
+                # A failed concurrent build leaves an invalid index behind
+                try:
+                    cr.execute(drop_sql)
+                except Exception as drop_error:
+                    _logger.error("Error dropping invalid index %s: %s", advice.index_name, drop_error)
+                advice.write({'state': 'failed', 'error': str(e)})
+            finally:
+                cr._cnx.autocommit = False
+                cr.close()
+        self.filtered(lambda a: a.state == 'created').action_benchmark()
+        return True
+
+    def action_drop_index(self):
+        self._check_admin()
+        for advice in self.filtered(lambda a: a.state == 'created'):
+            _create_sql, drop_sql = advice._get_index_sql()
+            cr = sql_db.db_connect(self.env.cr.dbname).cursor()
+            try:
+                cr._cnx.autocommit = True
+                cr.execute(drop_sql)
+            finally:
+                cr._cnx.autocommit = False
+                cr.close()
+            advice.write({'state': 'proposed', 'duration_after': 0.0})
+        return True
+
+    def action_benchmark(self):
+        """Measure the block query again, with the indexes now in place"""
+        for advice in self:
+            block = advice.block_id
+            today = fields.Date.context_today(self)
+            sql = block._get_block_sql(block, str(today - timedelta(days=30)), str(today))
+            if sql:
+                advice.duration_after = self._benchmark(block, sql) or 0.0
+        return True
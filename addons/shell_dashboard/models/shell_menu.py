@@ -106,3 +106,9 @@ class DashboardMenu(models.Model):
 
         return res
 
+    def action_advise_indexes(self):
+        """Index advice for every block of the dashboard"""
+        blocks = self.env['dashboard.block'].search([
+            ('client_action_id', 'in', self.client_action_id.ids)
+        ])
+        return blocks.action_advise_indexes()
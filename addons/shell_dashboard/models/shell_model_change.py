@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from odoo import api, fields, models
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Seconds between two notifications of the same model by a worker
+DEFAULT_NOTIFY_INTERVAL = 5
+
+# {(dbname, model_name): monotonic time of the last notification sent by this process}
+_last_notified = {}
+# {dbname: monotonic time until which the change job is already triggered}
+_job_triggered_until = {}
+_notify_lock = threading.Lock()
+
+
+class DashboardModelChange(models.Model):
+    """Change log of the source models of the dashboard blocks
+
+    Every committed transaction that created, wrote or deleted records of
+    a model through the ORM appends a row: concurrent transactions never
+    update a shared row, so they do not wait on each other. The version of
+    a model is the sum of its change counts, kept when the change job folds
+    the rows into one per model.
+    """
+    _name = "dashboard.model.change"
+    _description = "Dashboard Source Model Change"
+    _rec_name = "model_name"
+    _log_access = False
+
+    model_name = fields.Char(string="Model", required=True, index=True)
+    change_count = fields.Integer(string="Changes", default=1)
+    date = fields.Datetime(string="Last Change")
+    folded = fields.Boolean(string="Folded", help="Sum of rows already notified by the change job")
+
+    def init(self):
+        # The log replaced one counter row per model, updated by every commit
+        self.env.cr.execute(
+            "ALTER TABLE dashboard_model_change DROP CONSTRAINT IF EXISTS dashboard_model_change_model_name_uniq"
+        )
+
+    @api.model
+    def _flush_changes(self):
+        """Pre-commit hook: log the models written in the transaction, notify their dashboards
+
+        A model is notified at most once per ``dashboard.notify_interval``
+        seconds by each worker; the changes made meanwhile are notified by
+        the change job at the end of the interval.
+        """
+        model_names = self.env.cr.precommit.data.pop('shell_dashboard.changed_models', set())
+        if not model_names:
+            return
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute("""
+                    INSERT INTO dashboard_model_change (model_name, change_count, date, folded)
+                    SELECT name, 1, clock_timestamp() AT TIME ZONE 'UTC', FALSE
+                      FROM unnest(%s::varchar[]) AS name
+                """, (sorted(model_names),))
+        except Exception as e:
+            _logger.error("Error logging dashboard model changes: %s", e)
+
+        interval = self._get_notify_interval()
+        dbname = self.env.cr.dbname
+        now = time.monotonic()
+        with _notify_lock:
+            due = {
+                name for name in model_names
+                if now - _last_notified.get((dbname, name), float('-inf')) >= interval
+            }
+            _last_notified.update(dict.fromkeys(((dbname, name) for name in due), now))
+            trigger = due != model_names and _job_triggered_until.get(dbname, 0) < now
+            if trigger:
+                _job_triggered_until[dbname] = now + interval
+        if due:
+            self.env['dashboard.block']._notify_changed_models(due)
+        if trigger:
+            self.env.ref('shell_dashboard.ir_cron_dashboard_model_change').sudo()._trigger(
+                at=fields.Datetime.now() + timedelta(seconds=interval)
+            )
+
+    @api.model
+    def _get_notify_interval(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'dashboard.notify_interval', DEFAULT_NOTIFY_INTERVAL))
+
+    @api.model
+    def _cron_fold_changes(self):
+        """Fold the change rows into one per model, notify the models changed since the last run"""
+        self.env.cr.execute("""
+            WITH deleted AS (
+                DELETE FROM dashboard_model_change RETURNING model_name, change_count, date, folded
+            ), inserted AS (
+                INSERT INTO dashboard_model_change (model_name, change_count, date, folded)
+                SELECT model_name, SUM(change_count), MAX(date), TRUE FROM deleted GROUP BY model_name
+            )
+            SELECT DISTINCT model_name FROM deleted WHERE NOT folded
+        """)
+        changed = {model_name for model_name, in self.env.cr.fetchall()}
+        if changed:
+            self.env['dashboard.block']._notify_changed_models(changed)
+
+    @api.model
+    def _get_versions(self, model_names):
+        """Return ``{model_name: version}``, 0 for models never changed"""
+        model_names = [name for name in model_names if name]
+        if not model_names:
+            return {}
+        self.env.cr.execute("""
+            SELECT model_name, SUM(change_count)
+              FROM dashboard_model_change
+             WHERE model_name = ANY(%s)
+          GROUP BY model_name
+        """, (model_names,))
+        versions = dict.fromkeys(model_names, 0)
+        versions.update(self.env.cr.fetchall())
+        return versions
+
+
+class DashboardBlock(models.Model):
+    """Skip the recomputation of blocks whose source model did not change"""
+    _inherit = "dashboard.block"
+
+    source_version = fields.Integer(
+        string="Source Version",
+        readonly=True,
+        copy=False,
+        help="Change counter of the source model when the value was last computed"
+    )
+
+    def _get_changed_blocks(self, versions):
+        """Blocks never refreshed, or whose source model changed since"""
+        return self.filtered(
+            lambda b: not b.last_refresh or b.source_version != versions.get(b.model_name, 0)
+        )
+
+    def _refresh_values(self):
+        """Recompute changed blocks only; the others are just rescheduled"""
+        # Read before computing, so changes made meanwhile trigger the next run
+        versions = self.env['dashboard.model.change']._get_versions(set(self.mapped('model_name')))
+        changed = self._get_changed_blocks(versions)
+        (self - changed)._schedule_next_refresh()
+        if not changed:
+            return
+        super(DashboardBlock, changed)._refresh_values()
+        for model_name, version in versions.items():
+            changed.filtered(lambda b: b.model_name == model_name)._write_refresh_fields({'source_version': version})
+
+    def action_refresh_data(self):
+        # A manual refresh recomputes even unchanged blocks
+        self._write_refresh_fields({'source_version': -1})
+        return super().action_refresh_data()
+
+    def _prepare_block_data(self, blocks, start_date=None, end_date=None):
+        """Expire the cached results of models changed by any worker"""
+        versions = self.env['dashboard.model.change']._get_versions(set(blocks.mapped('model_name')))
+        cache = self._get_block_cache()
+        for model_name, version in versions.items():
+            cache.sync_version(model_name, version)
+        return super()._prepare_block_data(blocks, start_date, end_date)
+
+
+class Base(models.AbstractModel):
+    """Record which block source models a transaction writes"""
+    _inherit = 'base'
+
+    def _invalidate_dashboard_cache(self):
+        super()._invalidate_dashboard_cache()
+        if not self.env.registry.ready or 'dashboard.block' not in self.env:
+            return
+        if self._name not in self.env['dashboard.block'].sudo()._get_live_models():
+            return
+        # One counter bump and notification per transaction and model, on commit
+        changed = self.env.cr.precommit.data.setdefault('shell_dashboard.changed_models', set())
+        if not changed:
+            self.env.cr.precommit.add(self.env['dashboard.model.change'].sudo()._flush_changes)
+        changed.add(self._name)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+
+# Threads of the pool shared by all requests of a process. The configured
+# pool size only bounds the blocks each request runs at once.
+MAX_POOL_SIZE = 16
+DEFAULT_POOL_SIZE = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the worker pool shared by all requests of this process
+
+    The pool is never shut down or replaced: other requests may be
+    submitting to it. Its threads are only started when needed.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_POOL_SIZE, thread_name_prefix='shell_dashboard')
+        return _executor
+
+
+def run_bounded(executor, func, items, limit):
+    """Run ``func(item)`` on ``executor`` with at most ``limit`` items in flight
+
+    Returns ``{item: result}``. Exceptions are returned as results so one
+    failing item never cancels the others.
+    """
+    results = {}
+    pending = {}
+    items = list(items)
+    while items or pending:
+        while items and len(pending) < limit:
+            item = items.pop(0)
+            pending[executor.submit(func, item)] = item
+        done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                results[item] = e
+    return results
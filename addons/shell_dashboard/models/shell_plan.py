@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict, namedtuple
+import hashlib
+import logging
+import threading
+import weakref
+
+import psycopg2
+from psycopg2.extensions import AsIs
+
+_logger = logging.getLogger(__name__)
+
+# Compiled plans kept per process, and prepared statements kept per connection
+MAX_PLANS = 2000
+MAX_PREPARED_STATEMENTS = 200
+
+STATEMENT_PREFIX = 'shell_dash_'
+
+CompiledPlan = namedtuple('CompiledPlan', ['name', 'sql', 'param_count'])
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+# {connection: OrderedDict(statement name -> True)}, oldest first
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def get_slots(count):
+    """Placeholders rendered as ``$1, $2, ...`` by ``cursor.mogrify``"""
+    return [AsIs(f"${index}") for index in range(1, count + 1)]
+
+
+def compile_plan(sql, param_count):
+    """Plan of a SQL template whose parameters are ``$1 .. $n`` slots
+
+    The statement name derives from the SQL text, so blocks producing the
+    same query share one prepared statement.
+    """
+    name = STATEMENT_PREFIX + hashlib.sha1(sql.encode()).hexdigest()[:20]
+    return CompiledPlan(name, sql, param_count)
+
+
+def get_plan(key):
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+        return plan
+
+
+def set_plan(key, plan):
+    with _plans_lock:
+        _plans[key] = plan
+        _plans.move_to_end(key)
+        while len(_plans) > MAX_PLANS:
+            _plans.popitem(last=False)
+
+
+def clear_plans():
+    with _plans_lock:
+        _plans.clear()
+
+
+def discard_plan(cr, plan):
+    """Forget ``plan`` after a failure: it is compiled and prepared again next time
+
+    Prepared statements are not rolled back with the transaction, so the
+    statement is deallocated on the connection of ``cr`` too.
+    """
+    with _plans_lock:
+        for key in [key for key, cached in _plans.items() if cached.name == plan.name]:
+            del _plans[key]
+    with _prepared_lock:
+        statements = _prepared.get(cr._cnx)
+    if statements is None or statements.pop(plan.name, None) is None:
+        return
+    try:
+        with cr.savepoint(flush=False):
+            cr.execute(f"DEALLOCATE {plan.name}")
+    except psycopg2.Error as e:
+        # The connection is gone, and its statements with it
+        _logger.warning("Could not deallocate %s: %s", plan.name, e)
+
+
+def _get_prepared(cr):
+    """Statements prepared on the connection of ``cr``, read from the server once"""
+    cnx = cr._cnx
+    with _prepared_lock:
+        statements = _prepared.get(cnx)
+    if statements is None:
+        cr.execute(
+            "SELECT name FROM pg_prepared_statements WHERE name LIKE %s",
+            (STATEMENT_PREFIX + '%',)
+        )
+        statements = OrderedDict((name, True) for name, in cr.fetchall())
+        with _prepared_lock:
+            _prepared[cnx] = statements
+    return statements
+
+
+def prepare_plan(cr, plan, params):
+    """Prepare ``plan`` on the connection of ``cr`` if needed
+
+    Returns the ``EXECUTE`` statement running it with ``params``. Prepared
+    statements outlive transactions, so PostgreSQL plans each one once per
+    connection.
+    """
+    statements = _get_prepared(cr)
+    if plan.name in statements:
+        statements.move_to_end(plan.name)
+    else:
+        cr.execute(f"PREPARE {plan.name} AS {plan.sql}")
+        statements[plan.name] = True
+        while len(statements) > MAX_PREPARED_STATEMENTS:
+            oldest, _prepared_flag = statements.popitem(last=False)
+            cr.execute(f"DEALLOCATE {oldest}")
+
+    if not plan.param_count:
+        return f"EXECUTE {plan.name}"
+    placeholders = ", ".join(["%s"] * plan.param_count)
+    return cr.mogrify(f"EXECUTE {plan.name}({placeholders})", tuple(params)).decode("utf-8")
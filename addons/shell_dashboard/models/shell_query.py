@@ -1,10 +1,77 @@
 from odoo import models
+from odoo.exceptions import UserError
 from odoo.osv import expression
+from odoo.tools import SQL
+
+AGGREGATE_OPERATIONS = ("count", "sum", "avg", "min", "max")
+
+# Time buckets of date/datetime chart groups: (series step, label format)
+DATE_BUCKETS = {
+    'hour': ('1 hour', 'YYYY-MM-DD HH24:00'),
+    'day': ('1 day', 'YYYY-MM-DD'),
+    'week': ('1 week', 'IYYY-"W"IW'),
+    'month': ('1 month', 'YYYY-MM'),
+    'quarter': ('3 months', 'YYYY-"Q"Q'),
+    'year': ('1 year', 'YYYY'),
+}
+
+
+class QueryRefused(UserError):
+    """Dashboard query refused because its estimated cost is over budget"""
+
+
+def get_aggregate_sql(self, operation, field_name=None):
+    """SQL aggregate of a block operation, shared by every block query
+
+    ``count`` counts the matching records, as ``search_count`` does,
+    whatever the measured field; the other operations aggregate the
+    stored field ``field_name`` and skip its NULL values.
+    """
+    op = (operation or 'count').lower()
+    if op not in AGGREGATE_OPERATIONS:
+        raise ValueError(f"Invalid operation: {op}")
+    if op == 'count':
+        return "COUNT(*)"
+    if not field_name or field_name not in self._fields:
+        raise ValueError(f"Invalid field: {field_name}")
+    return f'{op}("{self._table}"."{field_name}")'
+
+
+def get_top_n_query(query_str, group_name, operation, limit, descending=True, count_column=None):
+    """Keep the ``limit`` best groups of a grouped query, fold the rest into one row
+
+    ``query_str`` returns one row per group with a ``value`` column. Groups
+    are ranked on ``value`` and the remainder is combined according to
+    ``operation`` into a single row flagged ``is_others``; averages are
+    weighted by ``count_column`` when available.
+    """
+    op = (operation or 'count').lower()
+    if op == 'avg' and count_column:
+        others_value = f'SUM(value * "{count_column}") / NULLIF(SUM("{count_column}"), 0)'
+    else:
+        others_value = {'min': "MIN(value)", 'max': "MAX(value)", 'avg': "AVG(value)"}.get(op, "SUM(value)")
+    direction = "DESC" if descending else "ASC"
+    return f"""
+        WITH groups AS ({query_str}),
+        ranked AS (
+            SELECT *, row_number() OVER (ORDER BY value {direction} NULLS LAST) AS rank FROM groups
+        )
+        SELECT "{group_name}", value, FALSE AS is_others, rank
+        FROM ranked WHERE rank <= {int(limit)}
+        UNION ALL
+        SELECT NULL, COALESCE({others_value}, 0), TRUE, {int(limit) + 1}
+        FROM ranked WHERE rank > {int(limit)} HAVING COUNT(*) > 0
+        ORDER BY rank
+    """
 
 
 def get_query(self, args, operation, field, start_date=None, end_date=None,
-              group_by=False, apply_ir_rules=False):
-    """Safe Dashboard block Query Creation"""
+              group_by=False, apply_ir_rules=False, limit=0, descending=True):
+    """Safe Dashboard block Query Creation
+
+    With ``group_by`` and ``limit``, only the top ``limit`` groups are
+    returned plus one "others" row (see ``get_top_n_query``).
+    """
     query = self._where_calc(args)
     if apply_ir_rules:
         self._apply_ir_rules(query, 'read')
@@ -14,15 +81,9 @@ def get_query(self, args, operation, field, start_date=None, end_date=None,
     group_by_str = ""
 
     # --- SELECT FIELD ---
-    if operation and field:
-        if field.name not in self._fields:
-            raise ValueError(f"Invalid field: {field.name}")
-
-        op = operation.lower()
-        if op not in ("sum", "avg", "count"):
-            raise ValueError(f"Invalid operation: {op}")
-
-        select_clause.append(f"COALESCE({op}(\"{self._table}\".\"{field.name}\"),0) AS value")
+    if operation or group_by:
+        value_expr = get_aggregate_sql(self, operation, field.name if field else None)
+        select_clause.append(f"COALESCE({value_expr}, 0) AS value")
 
         # --- GROUP BY handling ---
         if group_by:
@@ -40,6 +101,12 @@ def get_query(self, args, operation, field, start_date=None, end_date=None,
             else:
                 select_clause.append(f'"{self._table}"."{group_by.name}"')
                 group_by_str = f' GROUP BY "{self._table}"."{group_by.name}"'
+
+            if limit:
+                # Weight of each group when averages are folded together: the values it averaged
+                counts_rows = (operation or 'count').lower() == 'count'
+                weight = "*" if counts_rows else f'"{self._table}"."{field.name}"'
+                select_clause.append(f'COUNT({weight}) AS "__count"')
     else:
         select_clause.append(f'"{self._table}".id')
 
@@ -48,7 +115,7 @@ def get_query(self, args, operation, field, start_date=None, end_date=None,
     # --- WHERE ---
     from_clause, from_params = query.from_clause
     where_clause, where_params = query.where_clause
-    where_str = f" WHERE {where_clause}" if where_clause else ""
+    where_str = f" WHERE {where_clause}" if where_clause else " WHERE TRUE"
 
     # --- Date filter ---
     date_filter = ""
@@ -64,8 +131,182 @@ def get_query(self, args, operation, field, start_date=None, end_date=None,
         FROM {from_clause} {join}
         {where_str} {date_filter} {group_by_str}
     """
+    if group_by and limit:
+        query_str = get_top_n_query(query_str, group_by.name, operation, limit, descending, '__count')
 
     return self._cr.mogrify(query_str, tuple(where_params)).decode("utf-8")
 
 
-models.BaseModel.get_query = get_query
\ No newline at end of file
+def get_fused_query(self, aggregates, start_date=None, end_date=None,
+                    group_by=False, apply_ir_rules=False, extra_group_by=()):
+    """Build a single query evaluating the aggregates of many blocks
+
+    ``aggregates`` is a list of ``(alias, operation, field_name, domain)``.
+    Record rules and the date filter are applied once. When every block
+    shares the same domain it goes into the WHERE clause, otherwise each
+    block domain becomes a ``FILTER (WHERE ...)`` clause on its aggregate,
+    archived records being skipped as ``get_query`` does. With
+    ``group_by``, a ``<alias>__count`` column is added so callers can drop
+    the groups a block's filter did not match. ``extra_group_by`` names
+    stored fields added to the groups, e.g. ``company_id``.
+    """
+    domains = [domain or [] for _alias, _op, _field, domain in aggregates]
+    shared_domain = all(domain == domains[0] for domain in domains)
+
+    if shared_domain:
+        query = self._where_calc(domains[0] if domains else [])
+    else:
+        # The active filter belongs to each block domain, one may read archived records
+        query = self._where_calc([], active_test=False)
+    if apply_ir_rules:
+        self._apply_ir_rules(query, 'read')
+
+    select_clause = []
+    join = SQL()
+    group_by_sql = SQL()
+
+    # --- AGGREGATES ---
+    for alias, operation, field_name, domain in aggregates:
+        expr = SQL(get_aggregate_sql(self, operation, field_name))
+
+        filter_sql = SQL()
+        if not shared_domain:
+            sub_query = self._where_calc(domain or [])
+            if sub_query._joins:
+                raise ValueError(f"Domain {domain} needs joins and cannot be fused")
+            if sub_query.where_clause:
+                filter_sql = SQL(" FILTER (WHERE %s)", sub_query.where_clause)
+
+        select_clause.append(SQL("COALESCE(%s%s, 0) AS %s", expr, filter_sql, SQL.identifier(alias)))
+        if group_by:
+            select_clause.append(SQL("COUNT(*)%s AS %s", filter_sql, SQL.identifier(f"{alias}__count")))
+
+    # --- GROUP BY handling ---
+    if group_by:
+        if group_by.name not in self._fields:
+            raise ValueError(f"Invalid group_by field: {group_by.name}")
+
+        if group_by.ttype == 'many2one':
+            rel_model = self.env[group_by.relation]
+            rel_table = SQL.identifier(rel_model._table)
+            rec_name = SQL.identifier(rel_model._table, rel_model._rec_name_fallback())
+
+            join = SQL(
+                " INNER JOIN %s ON %s = %s",
+                rel_table, SQL.identifier(rel_model._table, 'id'), SQL.identifier(self._table, group_by.name),
+            )
+            select_clause.append(SQL("%s AS %s", rec_name, SQL.identifier(group_by.name)))
+            group_columns = [rec_name]
+        else:
+            column = SQL.identifier(self._table, group_by.name)
+            select_clause.append(column)
+            group_columns = [column]
+
+        for name in extra_group_by:
+            if name not in self._fields or not self._fields[name].store:
+                raise ValueError(f"Invalid group_by field: {name}")
+            column = SQL.identifier(self._table, name)
+            select_clause.append(column)
+            group_columns.append(column)
+        group_by_sql = SQL(" GROUP BY %s", SQL(", ").join(group_columns))
+
+    # --- WHERE ---
+    where_clause = query.where_clause or SQL("TRUE")
+
+    # --- Date filter ---
+    date_filter = []
+    if start_date and start_date != 'null':
+        date_filter.append(SQL(" AND %s >= %s", SQL.identifier(self._table, 'create_date'), start_date))
+    if end_date and end_date != 'null':
+        date_filter.append(SQL(" AND %s <= %s", SQL.identifier(self._table, 'create_date'), end_date))
+
+    query_sql = SQL(
+        "SELECT %s FROM %s%s WHERE %s%s%s",
+        SQL(", ").join(select_clause), query.from_clause, join,
+        where_clause, SQL().join(date_filter), group_by_sql,
+    )
+    return self._cr.mogrify(query_sql).decode("utf-8")
+
+
+def get_bucket_query(self, args, operation, field, group_by, bucket, tz='UTC',
+                     start_date=None, end_date=None, apply_ir_rules=False):
+    """Chart query grouping a date/datetime field into time buckets
+
+    Datetimes are truncated in timezone ``tz``. The date range is applied
+    on the bucketed column as a half-open range on the raw value so an
+    index on it can be used, and empty buckets are filled with 0 by
+    ``generate_series``. Rows are ``{group_by.name: label, 'value': n}``
+    in chronological order.
+    """
+    if bucket not in DATE_BUCKETS:
+        raise ValueError(f"Invalid bucket: {bucket}")
+    if group_by.name not in self._fields or group_by.ttype not in ('date', 'datetime'):
+        raise ValueError(f"Invalid date group_by field: {group_by.name}")
+
+    query = self._where_calc(args)
+    if apply_ir_rules:
+        self._apply_ir_rules(query, 'read')
+
+    step, label_format = DATE_BUCKETS[bucket]
+    column = SQL.identifier(self._table, group_by.name)
+
+    # --- VALUE ---
+    value_expr = SQL(get_aggregate_sql(self, operation, field.name if field else None))
+
+    # --- BUCKET AND RANGE (local dates converted to UTC bounds) ---
+    if group_by.ttype == 'datetime':
+        bucket_expr = SQL("date_trunc(%s, %s AT TIME ZONE 'UTC' AT TIME ZONE %s)", bucket, column, tz)
+
+        def lower_bound(date):
+            return SQL("((%s::date)::timestamp AT TIME ZONE %s AT TIME ZONE 'UTC')", date, tz)
+
+        def upper_bound(date):
+            return SQL("((%s::date + 1)::timestamp AT TIME ZONE %s AT TIME ZONE 'UTC')", date, tz)
+    else:
+        bucket_expr = SQL("date_trunc(%s, %s::timestamp)", bucket, column)
+
+        def lower_bound(date):
+            return SQL("%s::date", date)
+
+        def upper_bound(date):
+            return SQL("(%s::date + 1)", date)
+
+    range_filter = []
+    series_start, series_end = SQL("NULL::timestamp"), SQL("NULL::timestamp")
+    if start_date and start_date != 'null':
+        range_filter.append(SQL(" AND %s >= %s", column, lower_bound(start_date)))
+        series_start = SQL("date_trunc(%s, (%s::date)::timestamp)", bucket, start_date)
+    if end_date and end_date != 'null':
+        range_filter.append(SQL(" AND %s < %s", column, upper_bound(end_date)))
+        series_end = SQL("date_trunc(%s, (%s::date)::timestamp)", bucket, end_date)
+
+    # --- WHERE ---
+    where_clause = query.where_clause or SQL("TRUE")
+
+    query_sql = SQL("""
+        WITH data AS (
+            SELECT %s AS bucket, COALESCE(%s, 0) AS value
+            FROM %s
+            WHERE %s%s
+            GROUP BY 1
+        ), bounds AS (
+            SELECT COALESCE(%s, min(bucket)) AS lo,
+                   COALESCE(%s, max(bucket)) AS hi
+            FROM data
+        )
+        SELECT to_char(series.bucket, %s) AS %s, COALESCE(data.value, 0) AS value
+        FROM bounds
+        CROSS JOIN generate_series(bounds.lo, bounds.hi, %s::interval) AS series(bucket)
+        LEFT JOIN data ON data.bucket = series.bucket
+        ORDER BY series.bucket
+    """,
+        bucket_expr, value_expr, query.from_clause, where_clause, SQL().join(range_filter),
+        series_start, series_end, label_format, SQL.identifier(group_by.name), step,
+    )
+    return self._cr.mogrify(query_sql).decode("utf-8")
+
+
+models.BaseModel.get_aggregate_sql = get_aggregate_sql
+models.BaseModel.get_query = get_query
+models.BaseModel.get_bucket_query = get_bucket_query
+models.BaseModel.get_fused_query = get_fused_query
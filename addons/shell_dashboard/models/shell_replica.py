@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import logging
+import threading
+import time
+
+import psycopg2
+
+from odoo import api, sql_db
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Seconds a replica health check result is trusted
+HEALTH_CHECK_INTERVAL = 10
+
+# Seconds to wait for a replica connection before falling back to the primary
+DEFAULT_CONNECT_TIMEOUT = 3
+
+# Lag (s) of the replica: 0 when it replayed everything it received
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_replica_health = {}
+_replica_health_lock = threading.Lock()
+
+
+def get_replica_dsn(env):
+    """Replica URI from ``dashboard.replica_dsn`` or odoo.conf ``shell_dashboard_replica_dsn``
+
+    A ``connect_timeout`` (``dashboard.replica_connect_timeout``) is added
+    unless the URI sets one, so an unreachable replica fails fast instead
+    of hanging requests for the OS TCP timeout.
+    """
+    params = env['ir.config_parameter'].sudo()
+    dsn = params.get_param('dashboard.replica_dsn') or config.get('shell_dashboard_replica_dsn')
+    if not dsn:
+        return None
+    timeout = int(params.get_param('dashboard.replica_connect_timeout', DEFAULT_CONNECT_TIMEOUT))
+    parts = urlsplit(dsn)
+    query = parse_qsl(parts.query)
+    if timeout > 0 and 'connect_timeout' not in dict(query):
+        query.append(('connect_timeout', str(timeout)))
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+def mark_replica_down(dsn):
+    """Stop routing to ``dsn`` until the next health check"""
+    with _replica_health_lock:
+        _replica_health[dsn] = (time.monotonic(), False)
+
+
+def _check_replica(dsn, max_lag):
+    try:
+        with sql_db.db_connect(dsn, allow_uri=True).cursor() as cr:
+            cr.execute(LAG_QUERY)
+            lag = float(cr.fetchone()[0] or 0)
+    except Exception as e:
+        _logger.warning("Dashboard replica unavailable, using the primary: %s", e)
+        return False
+    if lag > max_lag:
+        _logger.warning("Dashboard replica lags %.1fs (max %ss), using the primary", lag, max_lag)
+        return False
+    return True
+
+
+def get_replica_cursor(env):
+    """Return a pooled read-only cursor on the replica, or None to use the primary"""
+    dsn = get_replica_dsn(env)
+    if not dsn:
+        return None
+
+    now = time.monotonic()
+    with _replica_health_lock:
+        checked_at, healthy = _replica_health.get(dsn, (None, False))
+        due = checked_at is None or now - checked_at > HEALTH_CHECK_INTERVAL
+        if due:
+            # One request checks, the concurrent ones keep the last result meanwhile
+            _replica_health[dsn] = (now, healthy)
+    if due:
+        max_lag = float(env['ir.config_parameter'].sudo().get_param('dashboard.replica_max_lag', 30))
+        healthy = _check_replica(dsn, max_lag)
+        with _replica_health_lock:
+            _replica_health[dsn] = (time.monotonic(), healthy)
+    if not healthy:
+        return None
+
+    try:
+        cr = sql_db.db_connect(dsn, allow_uri=True).cursor()
+        cr.execute("SET TRANSACTION READ ONLY")
+        return cr
+    except psycopg2.Error as e:
+        _logger.warning("Cannot open a dashboard replica cursor, using the primary: %s", e)
+        mark_replica_down(dsn)
+        return None
+
+
+@contextmanager
+def replica_env(env):
+    """Yield an environment reading from the replica, or ``env`` itself
+
+    The replica environment shares the registry, user and context of
+    ``env``; only the cursor differs.
+    """
+    cr = get_replica_cursor(env)
+    if cr is None:
+        yield env
+        return
+    try:
+        cr.transaction = api.Transaction(env.registry)
+        yield api.Environment(cr, env.uid, env.context, su=env.su)
+    finally:
+        cr.close()
@@ -1,6 +1,7 @@
 /** @odoo-module **/
-import { Component, useRef, onMounted, onWillUnmount } from "@odoo/owl";
+import { Component, useRef, onMounted, onPatched, onWillUnmount } from "@odoo/owl";
 import { useService } from "@web/core/utils/hooks";
+import { download } from "@web/core/network/download";
 
 export class DashboardChart extends Component {
     static template = "shell_dashboard.Chart";
@@ -23,6 +24,13 @@ export class DashboardChart extends Component {
             this.setupResizeObserver();
         });
 
+        // Redraw when a refresh delivered new data for this block
+        onPatched(() => {
+            if (this.renderedToken !== this.props.block.data_token) {
+                this.initializeChart();
+            }
+        });
+
         // Cleanup chart
         onWillUnmount(() => {
             if (this.resizeObserver) {
@@ -53,15 +61,18 @@ export class DashboardChart extends Component {
 
         const ctx = this.chartCanvas.el.getContext('2d');
         const block = this.props.block;
+        this.renderedToken = block.data_token;
         console.log('block :', block);
 
         // Prepare chart data
+        const dataset = block.data.datasets?.[0] || {};
         const chartData = {
             labels: block.data.labels || [],
             datasets: [{
                 label: block.name,
-                data: block.data.datasets?.[0]?.data || [],
-                backgroundColor: this.getChartColors(block.data.labels?.length || 0),
+                data: dataset.data || [],
+                // Server colours keep the grey "Others" group
+                backgroundColor: dataset.backgroundColor || this.getChartColors(block.data.labels?.length || 0),
                 borderColor: block.type === 'line' || block.type === 'radar'
                     ? this.getChartColors(1, true)
                     : undefined,
@@ -164,6 +175,23 @@ export class DashboardChart extends Component {
         }
     }
 
+    async exportData(fileFormat) {
+        // Full data streamed by the server, with the dashboard date filter
+        try {
+            await download({
+                url: `/api/shell_dashboard/export/${this.props.block.id}`,
+                data: {
+                    file_format: fileFormat,
+                    start_date: this.props.startDate || "",
+                    end_date: this.props.endDate || "",
+                },
+            });
+        } catch (error) {
+            console.error("Error exporting block data:", error);
+            this.notification.add("Failed to export data", { type: "danger" });
+        }
+    }
+
     async exportChart(format) {
         console.log('exportChart called with', format);
         if (!this.chart) return;
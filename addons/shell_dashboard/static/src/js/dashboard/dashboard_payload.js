@@ -0,0 +1,39 @@
+/** @odoo-module **/
+
+// Compact dashboard payloads: gzip-negotiated JSON with columnar block data
+
+export async function fetchCompact(url, params) {
+    // The body is JSON, so the CSRF token of the session goes in the query string
+    const query = new URLSearchParams({ csrf_token: odoo.csrf_token });
+    const response = await fetch(`${url}?${query}`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(params),
+    });
+    if (!response.ok) {
+        throw new Error(`${url} failed with status ${response.status}`);
+    }
+    return response.json();
+}
+
+// Rebuild the verbose block data the components render from
+export function decodeBlockData(data) {
+    if (!data || data.format !== "columnar") {
+        return data;
+    }
+    const { format, ...rest } = data;
+    if (rest.ids) {
+        const { ids, values, ...table } = rest;
+        table.rows = ids.map((id, rowIndex) => {
+            const row = { id };
+            table.columns.forEach((column, columnIndex) => {
+                row[column] = values[columnIndex][rowIndex];
+            });
+            return row;
+        });
+        return table;
+    }
+    const { series, series_label, series_colors, ...chart } = rest;
+    chart.datasets = [{ label: series_label, data: series, backgroundColor: series_colors }];
+    return chart;
+}
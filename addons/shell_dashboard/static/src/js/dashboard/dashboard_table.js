@@ -1,6 +1,8 @@
 /** @odoo-module **/
-import { Component } from "@odoo/owl";
+import { Component, onWillUpdateProps, useState } from "@odoo/owl";
+import { rpc } from "@web/core/network/rpc";
 import { useService } from "@web/core/utils/hooks";
+import { download } from "@web/core/network/download";
 
 export class DashboardTable extends Component {
     static template = "shell_dashboard.Table";
@@ -11,6 +13,94 @@ export class DashboardTable extends Component {
         this.dialog = useService("dialog");
         this.notification = useService("notification");
         this.orm = useService("orm");
+        // Keyset pagination: cursors of the pages before the current one
+        this.state = useState({ page: null, cursors: [], loading: false });
+        onWillUpdateProps((nextProps) => {
+            if (nextProps.block.data !== this.props.block.data
+                || nextProps.startDate !== this.props.startDate
+                || nextProps.endDate !== this.props.endDate) {
+                this.state.page = null;
+                this.state.cursors = [];
+            }
+        });
+    }
+
+    async exportData(fileFormat) {
+        // Full data streamed by the server, with the dashboard date filter
+        try {
+            await download({
+                url: `/api/shell_dashboard/export/${this.props.block.id}`,
+                data: {
+                    file_format: fileFormat,
+                    start_date: this.props.startDate || "",
+                    end_date: this.props.endDate || "",
+                },
+            });
+        } catch (error) {
+            console.error("Error exporting block data:", error);
+            this.notification.add("Failed to export data", { type: "danger" });
+        }
+    }
+
+    get tableData() {
+        return this.state.page || this.props.block.data;
+    }
+
+    get total() {
+        return this.props.block.data.total;
+    }
+
+    get pageNumber() {
+        return this.state.cursors.length + 1;
+    }
+
+    async loadPage(cursor) {
+        this.state.loading = true;
+        try {
+            const page = await rpc("/api/shell_dashboard/list_page", {
+                block_id: this.props.block.id,
+                cursor: cursor,
+                start_date: this.props.startDate,
+                end_date: this.props.endDate,
+            });
+            if (page.error) {
+                this.notification.add(page.error, { type: "danger" });
+                return false;
+            }
+            this.state.page = page;
+            return true;
+        } catch (error) {
+            console.error("Error loading table page:", error);
+            this.notification.add("Failed to load table page", { type: "danger" });
+            return false;
+        } finally {
+            this.state.loading = false;
+        }
+    }
+
+    async nextPage() {
+        const cursor = this.tableData.next_cursor;
+        if (!cursor || this.state.loading) return;
+        const previous = this.state.page ? this.state.page.cursor : null;
+        if (await this.loadPage(cursor)) {
+            this.state.cursors.push(previous);
+            this.state.page.cursor = cursor;
+        }
+    }
+
+    async previousPage() {
+        if (!this.state.cursors.length || this.state.loading) return;
+        const cursor = this.state.cursors[this.state.cursors.length - 1];
+        if (!cursor) {
+            // Back to the first page, already in the block data
+            this.state.cursors.pop();
+            this.state.page = null;
+            return;
+        }
+        if (await this.loadPage(cursor)) {
+            this.state.cursors.pop();
+            this.state.page.cursor = cursor;
+        }
     }
     
     async configureBlock() {
@@ -7,8 +7,18 @@ import { DashboardChart } from './dashboard_chart';
 import { DashboardTable } from './dashboard_table';
 import { DashboardKPI } from './dashboard_kpi';
 import { session } from "@web/session";
+import { rpc } from "@web/core/network/rpc";
+import { decodeBlockData, fetchCompact } from "./dashboard_payload";
 import { mount } from "@odoo/owl";
 
+// Block changes are pushed by the server; bursts are coalesced and spread
+// over this delay so open tabs do not all hit the server at once
+const LIVE_UPDATE_DELAY = 1000;
+const LIVE_UPDATE_JITTER = 2000;
+const LIVE_NOTIFICATION = "shell_dashboard/blocks_changed";
+// Block data requests in flight at once, so a dashboard does not take every worker
+const MAX_BLOCK_REQUESTS = 2;
+
 export class ShellDashboard extends Component {
     static template = "shell_dashboard.Dashboard";
     static components = {
@@ -26,6 +36,7 @@ export class ShellDashboard extends Component {
         this.orm = useService("orm");
         this.dialog = useService("dialog");
         this.notification = useService("notification");
+        this.busService = useService("bus_service");
 
         // Refs
         this.gridRef = useRef("gridContainer");
@@ -35,7 +46,6 @@ export class ShellDashboard extends Component {
             loading: false,
             editMode: false,
             autoRefresh: false,
-            refreshCountdown: 30,
             showDatePicker: false,
             startDate: null,
             endDate: null,
@@ -52,7 +62,12 @@ export class ShellDashboard extends Component {
         // Gridstack instance
         this.grid = null;
         this.refreshInterval = null;
-        this.countdownInterval = null;
+        this.layoutVersion = null;
+        this.liveTimeout = null;
+        this.liveBlockIds = new Set();
+        this.liveConfig = false;
+        this.busChannel = `shell_dashboard_${this.props.action.id}`;
+        this.onBlocksChanged = this.onBlocksChanged.bind(this);
 
         // Initialize after mount
         onMounted(async () => {
@@ -85,11 +100,12 @@ export class ShellDashboard extends Component {
         try {
             const actionId = this.props.action.id;
 
-            const blocks = await this.orm.call(
-                "dashboard.block",
-                "get_dashboard_vals",
-                [actionId]
-            );
+            // Layout first, cheapest blocks first; data follows per batch
+            const [blocks, layoutVersion] = await Promise.all([
+                rpc("/api/shell_dashboard/layout", { action_id: actionId }),
+                this.orm.call("dashboard.block", "get_layout_version", [actionId]),
+            ]);
+            this.layoutVersion = layoutVersion;
 
             blocks.forEach(block => {
                 if (!block.grid_position) {
@@ -103,6 +119,8 @@ export class ShellDashboard extends Component {
             // pastikan OWL sudah render DOM
             setTimeout(() => this.initGrid(), 50);
 
+            this.loadBlockData(blocks.map(block => block.id));
+
         } catch (error) {
             console.error("Error initializing dashboard:", error);
             this.notification.add(
@@ -114,6 +132,52 @@ export class ShellDashboard extends Component {
         }
     }
 
+    async loadBlockData(blockIds, batchSize = 4) {
+        // The layout lists the blocks cheapest first: batches follow that order
+        const order = new Map(this.state.blocks.map((block, index) => [block.id, index]));
+        const sortedIds = [...blockIds].sort(
+            (a, b) => (order.get(a) ?? Infinity) - (order.get(b) ?? Infinity)
+        );
+        const batches = [];
+        for (let i = 0; i < sortedIds.length; i += batchSize) {
+            batches.push(sortedIds.slice(i, i + batchSize));
+        }
+
+        // A few requests in flight, each block paints as soon as its batch returns
+        const loadNext = async () => {
+            while (batches.length) {
+                await this.loadBlockBatch(batches.shift());
+            }
+        };
+        await Promise.all(
+            Array.from({ length: Math.min(MAX_BLOCK_REQUESTS, batches.length) }, loadNext)
+        );
+    }
+
+    async loadBlockBatch(batch) {
+        try {
+            const results = await fetchCompact("/api/shell_dashboard/compact/block_data", {
+                block_ids: batch,
+                start_date: this.state.startDate,
+                end_date: this.state.endDate,
+            });
+            for (const result of results) {
+                const block = this.state.blocks.find(b => b.id === result.id);
+                if (block) {
+                    Object.assign(block, result, { data: decodeBlockData(result.data) });
+                }
+            }
+        } catch (error) {
+            console.error("Error loading block data:", error);
+            for (const block of this.state.blocks) {
+                if (batch.includes(block.id) && !block.data) {
+                    block.data = {};
+                    block.error = "Failed to load data";
+                }
+            }
+        }
+    }
+
     initGrid() {
         if (!this.gridRef.el) return;
 
@@ -231,11 +295,17 @@ export class ShellDashboard extends Component {
 
 
         try {
-            await this.orm.call(
+            const result = await this.orm.call(
                 "dashboard.block",
                 "get_save_layout",
-                [layoutData]
+                [layoutData, this.props.action.id, this.layoutVersion]
             );
+            if (result.conflict) {
+                this.notification.add(result.message, { type: "warning" });
+                await this.refreshDashboard();
+                return;
+            }
+            this.layoutVersion = result.layout_version;
             this.notification.add("Layout saved successfully", { type: "success" });
         } catch (error) {
             console.error("Error saving layout:", error);
@@ -352,29 +422,99 @@ export class ShellDashboard extends Component {
     }
 
     startAutoRefresh() {
-        this.state.refreshCountdown = 30;
+        this.busService.addChannel(this.busChannel);
+        this.busService.subscribe(LIVE_NOTIFICATION, this.onBlocksChanged);
+    }
 
-        this.countdownInterval = setInterval(() => {
-            this.state.refreshCountdown--;
+    stopAutoRefresh() {
+        this.busService.unsubscribe(LIVE_NOTIFICATION, this.onBlocksChanged);
+        this.busService.deleteChannel(this.busChannel);
+        if (this.liveTimeout) {
+            clearTimeout(this.liveTimeout);
+            this.liveTimeout = null;
+        }
+        this.liveBlockIds.clear();
+        this.liveConfig = false;
+    }
 
-            if (this.state.refreshCountdown <= 0) {
-                this.refreshDashboard();
-                this.state.refreshCountdown = 30;
-            }
-        }, 1000);
+    onBlocksChanged(payload) {
+        if (payload.action_id !== this.props.action.id) {
+            return;
+        }
+        payload.block_ids.forEach(id => this.liveBlockIds.add(id));
+        this.liveConfig = this.liveConfig || payload.config;
+        if (!this.liveTimeout) {
+            const delay = LIVE_UPDATE_DELAY + Math.random() * LIVE_UPDATE_JITTER;
+            this.liveTimeout = setTimeout(() => this.applyLiveUpdates(), delay);
+        }
     }
 
-    stopAutoRefresh() {
-        if (this.countdownInterval) {
-            clearInterval(this.countdownInterval);
-            this.countdownInterval = null;
+    applyLiveUpdates() {
+        this.liveTimeout = null;
+        const blockIds = [...this.liveBlockIds];
+        const config = this.liveConfig;
+        this.liveBlockIds.clear();
+        this.liveConfig = false;
+
+        if (config) {
+            // Layout or settings changed: the delta API sends what differs
+            this.refreshDashboard();
+            return;
+        }
+        const shown = blockIds.filter(id => this.state.blocks.some(block => block.id === id));
+        if (shown.length) {
+            this.loadBlockData(shown);
+        }
+    }
+
+    getBlockTokens() {
+        const tokens = {};
+        for (const block of this.state.blocks) {
+            tokens[block.id] = { config: block.config_token, data: block.data_token };
+        }
+        return tokens;
+    }
+
+    applyDelta(delta) {
+        this.layoutVersion = delta.layout_version;
+        let layoutChanged = delta.removed.length > 0;
+        const blocks = this.state.blocks.filter(block => !delta.removed.includes(block.id));
+
+        for (const changed of delta.blocks) {
+            const index = blocks.findIndex(block => block.id === changed.id);
+            if (index === -1) {
+                blocks.push(changed);
+                layoutChanged = true;
+                continue;
+            }
+            if (changed.grid_position) {
+                layoutChanged = true;
+            }
+            blocks[index] = { ...blocks[index], ...changed };
+        }
+        this.state.blocks = blocks;
+
+        if (layoutChanged) {
+            setTimeout(() => this.initGrid(), 50);
         }
     }
 
     async refreshDashboard() {
         this.state.loading = true;
         try {
-            await this.initializeDashboard();
+            // Only blocks whose config or data changed come back
+            const delta = await fetchCompact("/api/shell_dashboard/compact/delta", {
+                action_id: this.props.action.id,
+                tokens: this.getBlockTokens(),
+                start_date: this.state.startDate,
+                end_date: this.state.endDate,
+            });
+            for (const block of delta.blocks) {
+                if ("data" in block) {
+                    block.data = decodeBlockData(block.data);
+                }
+            }
+            this.applyDelta(delta);
             this.notification.add("Dashboard refreshed", { type: "success" });
         } catch (error) {
             console.error("Error refreshing dashboard:", error);
@@ -384,7 +524,9 @@ export class ShellDashboard extends Component {
     }
 
     clearIntervals() {
-        this.stopAutoRefresh();
+        if (this.state.autoRefresh) {
+            this.stopAutoRefresh();
+        }
         if (this.refreshInterval) {
             clearInterval(this.refreshInterval);
             this.refreshInterval = null;
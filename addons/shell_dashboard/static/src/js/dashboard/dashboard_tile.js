@@ -30,6 +30,20 @@ export class DashboardTile extends Component {
         }
     }
 
+    getSparklinePoints(width = 100, height = 24) {
+        const values = this.props.block.data.sparkline || [];
+        if (values.length < 2) return "";
+
+        const min = Math.min(...values);
+        const max = Math.max(...values);
+        const range = max - min || 1;
+        const step = width / (values.length - 1);
+
+        return values
+            .map((value, index) => `${(index * step).toFixed(1)},${(height - ((value - min) / range) * height).toFixed(1)}`)
+            .join(" ");
+    }
+
     async configureBlock() {
         try {
             await this.action.doAction({
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from . import test_block_query
+from . import test_block_list
+from . import test_block_parallel
+from . import test_block_refresh
+from . import test_block_replica
+from . import test_index_advice
+from . import test_block_bus
+from . import test_block_layout
+from . import test_block_snapshot
+from . import test_block_matview
+from . import test_model_change
+from . import test_block_stat
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase
+
+TEST_REF = 'shell_dashboard_test'
+
+
+class ShellDashboardCase(TransactionCase):
+    """Partners with known values, read by the blocks of one test dashboard"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.action = cls.env['ir.actions.client'].create({
+            'name': 'Test Dashboard',
+            'tag': 'shell_dashboard.action',
+        })
+        cls.partner_model = cls.env['ir.model']._get('res.partner')
+        cls.domain = f"[('ref', '=', '{TEST_REF}')]"
+        # partner_latitude is left NULL when not given
+        cls.partners = cls.env['res.partner'].create([
+            {'name': 'Alpha 1', 'ref': TEST_REF, 'function': 'Alpha', 'partner_latitude': 1.5},
+            {'name': 'Alpha 2', 'ref': TEST_REF, 'function': 'Alpha'},
+            {'name': 'Beta 1', 'ref': TEST_REF, 'function': 'Beta', 'partner_latitude': 4.0},
+            {'name': 'Beta 2', 'ref': TEST_REF, 'function': 'Beta', 'partner_latitude': -2.0},
+            {'name': 'Gamma 1', 'ref': TEST_REF, 'function': 'Gamma'},
+        ])
+
+    @classmethod
+    def _field(cls, name):
+        return cls.env['ir.model.fields']._get('res.partner', name)
+
+    @classmethod
+    def _create_block(cls, **vals):
+        return cls.env['dashboard.block'].create(dict({
+            'name': 'Test Block',
+            'model_id': cls.partner_model.id,
+            'client_action_id': cls.action.id,
+            'filter': cls.domain,
+            'cache_ttl': 0,
+        }, **vals))
+
+    def _chart_values(self, data):
+        """``{label: value}`` of a chart payload"""
+        self.assertFalse(data.get('error'), data.get('error'))
+        return {
+            label: float(value) for label, value in zip(data['labels'], data['datasets'][0]['data'])
+        }
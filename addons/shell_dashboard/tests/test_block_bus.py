@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockBus(ShellDashboardCase):
+
+    def test_live_models_cleared_only_when_changed(self):
+        Block = self.env['dashboard.block']
+        block = self._create_block(type='tile')
+        self.assertIn('res.partner', Block._get_live_models())
+
+        with patch.object(self.env.registry, 'clear_cache') as clear_cache:
+            self._create_block(type='tile', name="Same model")
+            block.write({'name': "Renamed", 'filter': "[]"})
+            block.write({'model_id': self.partner_model.id})
+            clear_cache.assert_not_called()
+
+            country = self._create_block(
+                type='tile', name="Countries", model_id=self.env['ir.model']._get('res.country').id, filter="[]",
+            )
+            clear_cache.assert_called_once()
+            clear_cache.reset_mock()
+
+            country.write({'active': False})
+            clear_cache.assert_called_once()
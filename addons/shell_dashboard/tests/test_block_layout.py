@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockLayout(ShellDashboardCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.block = cls._create_block(type='tile', data_x=0, data_y=0)
+        cls.other_action = cls.env['ir.actions.client'].create({
+            'name': 'Other Dashboard',
+            'tag': 'shell_dashboard.action',
+        })
+        cls.other_block = cls._create_block(
+            type='tile', name="Other Block", client_action_id=cls.other_action.id, data_x=0, data_y=0,
+        )
+
+    def _save(self, blocks, layout_version):
+        return self.env['dashboard.block'].get_save_layout(
+            [{'id': block.id, 'x': 4, 'y': 2} for block in blocks], self.action.id, layout_version,
+        )
+
+    def test_save_layout_bumps_version(self):
+        version = self.env['dashboard.block'].get_layout_version(self.action.id)
+        res = self._save(self.block, version)
+        self.assertTrue(res['success'])
+        self.assertEqual(res['layout_version'], version + 1)
+        self.assertEqual((self.block.data_x, self.block.data_y), (4, 2))
+
+    def test_stale_layout_version_conflicts(self):
+        version = self.env['dashboard.block'].get_layout_version(self.action.id)
+        self.assertTrue(self._save(self.block, version)['success'])
+        self.block.write({'data_x': 0, 'data_y': 0})
+
+        # Saved from a tab loaded before the first save
+        res = self._save(self.block, version)
+        self.assertFalse(res['success'])
+        self.assertTrue(res['conflict'])
+        self.assertEqual(res['layout_version'], version + 1)
+        self.assertEqual((self.block.data_x, self.block.data_y), (0, 0))
+
+    def test_blocks_of_other_dashboards_not_moved(self):
+        version = self.env['dashboard.block'].get_layout_version(self.action.id)
+        res = self._save(self.block | self.other_block, version)
+        self.assertTrue(res['success'])
+        self.assertEqual((self.block.data_x, self.block.data_y), (4, 2))
+        self.assertEqual((self.other_block.data_x, self.other_block.data_y), (0, 0))
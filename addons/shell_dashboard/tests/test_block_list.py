@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import base64
+
+from odoo.tests import tagged
+
+from .common import TEST_REF, ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockList(ShellDashboardCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Ties with 'Alpha 1' on the sort column, next to the NULL latitudes
+        cls.env['res.partner'].create([
+            {'name': 'Tie 1', 'ref': TEST_REF, 'partner_latitude': 1.5},
+            {'name': 'Tie 2', 'ref': TEST_REF, 'partner_latitude': 1.5},
+        ])
+        latitude = cls._field('partner_latitude')
+        cls.table = cls._create_block(
+            name="Partners by Latitude", type='list', table_limit=2, list_sort_field_id=latitude.id,
+            tag_fields_ids=[(6, 0, (cls._field('name') | latitude).ids)],
+        )
+
+    def _get_pages(self):
+        """Names of the rows of each page, following the cursors to the end"""
+        Block = self.env['dashboard.block']
+        pages, cursor = [], None
+        for _page in range(10):
+            data = Block.get_list_page(self.table.id, cursor=cursor)
+            self.assertFalse(data.get('error'), data.get('error'))
+            if not pages:
+                self.assertEqual(data['total'], 7)
+            pages.append([row['name'] for row in data['rows']])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        return pages
+
+    def test_keyset_ascending(self):
+        self.table.list_sort_desc = False
+        self.assertEqual(self._get_pages(), [
+            ['Beta 2', 'Alpha 1'],
+            ['Tie 1', 'Tie 2'],
+            ['Beta 1', 'Alpha 2'],
+            ['Gamma 1'],
+        ])
+
+    def test_keyset_descending(self):
+        self.table.list_sort_desc = True
+        self.assertEqual(self._get_pages(), [
+            ['Beta 1', 'Tie 2'],
+            ['Tie 1', 'Alpha 1'],
+            ['Beta 2', 'Gamma 1'],
+            ['Alpha 2'],
+        ])
+
+    def test_malformed_cursor(self):
+        Block = self.env['dashboard.block']
+        valid = Block.get_list_page(self.table.id)['next_cursor']
+        for cursor in (
+            valid[:-3],
+            'not a cursor!',
+            base64.urlsafe_b64encode(b'{"id": 1}').decode(),
+            base64.urlsafe_b64encode(b'[1]').decode(),
+            base64.urlsafe_b64encode(b'["x", 1.5]').decode(),
+            base64.urlsafe_b64encode(b'[1, {"a": 1}]').decode(),
+            42,
+        ):
+            with self.subTest(cursor=cursor):
+                data = Block.get_list_page(self.table.id, cursor=cursor)
+                self.assertEqual(data, {'error': 'Invalid page cursor, reload the table'})
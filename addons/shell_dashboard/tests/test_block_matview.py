@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import new_test_user, tagged
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockMatview(ShellDashboardCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.other_company = cls.env['res.company'].create({'name': 'Shell Dashboard Other Company'})
+        cls.currency = cls.env['res.currency'].create({'name': 'SDT', 'symbol': 'S'})
+        cls.env['res.currency.rate'].create([
+            {'currency_id': cls.currency.id, 'company_id': cls.company.id, 'name': '2020-01-01', 'rate': 2.0},
+            {'currency_id': cls.currency.id, 'company_id': cls.other_company.id, 'name': '2020-01-01', 'rate': 3.0},
+            {'currency_id': cls.currency.id, 'company_id': cls.other_company.id, 'name': '2020-01-02', 'rate': 5.0},
+        ])
+        rate_model = cls.env['ir.model']._get('res.currency.rate')
+        # Make sure the model is restricted by a company rule only
+        cls.env['ir.rule'].create({
+            'name': 'Shell dashboard test company rule',
+            'model_id': rate_model.id,
+            'domain_force': "['|', ('company_id', '=', False), ('company_id', 'in', company_ids)]",
+        })
+        cls.user = new_test_user(
+            cls.env, login='shell_dashboard_matview', groups='base.group_user,shell_dashboard.group_dashboard_user',
+            company_id=cls.company.id, company_ids=[(6, 0, (cls.company | cls.other_company).ids)],
+        )
+        fields = cls.env['ir.model.fields']
+        cls.blocks = {
+            operation: cls._create_block(
+                name=f"Rates {operation}", type='graph', operation=operation, materialized=True,
+                model_id=rate_model.id, filter=f"[('currency_id', '=', {cls.currency.id})]",
+                measured_field_id=fields._get('res.currency.rate', 'rate').id,
+                group_by_id=fields._get('res.currency.rate', 'currency_id').id,
+            )
+            for operation in ('count', 'sum', 'avg', 'max')
+        }
+        for block in cls.blocks.values():
+            block._refresh_matview()
+
+    def _user_values(self, block, companies):
+        Block = self.env['dashboard.block'].with_user(self.user).with_context(allowed_company_ids=companies.ids)
+        block = block.with_env(Block.env)
+        self.assertTrue(Block._can_use_matview(block))
+        return self._chart_values(Block._get_matview_chart_data(block))
+
+    def test_matview_served_under_company_rules(self):
+        cases = {
+            'count': (1.0, 3.0),
+            'sum': (2.0, 10.0),
+            'avg': (2.0, 10.0 / 3),
+            'max': (2.0, 5.0),
+        }
+        for operation, (one_company, both_companies) in cases.items():
+            with self.subTest(operation=operation):
+                block = self.blocks[operation]
+                self.assertEqual(self._user_values(block, self.company), {'SDT': one_company})
+                values = self._user_values(block, self.company | self.other_company)
+                self.assertAlmostEqual(values['SDT'], both_companies)
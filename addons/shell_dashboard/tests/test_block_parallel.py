@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from odoo.addons.shell_dashboard.models.shell_parallel import get_executor
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockParallel(ShellDashboardCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        latitude = cls._field('partner_latitude')
+        cls.blocks = (
+            cls._create_block(name="Partners", type='tile', operation='count')
+            | cls._create_block(
+                name="Latitude by Job", type='graph', operation='sum',
+                measured_field_id=latitude.id, group_by_id=cls._field('function').id,
+            )
+            | cls._create_block(
+                name="Partners by Name", type='graph', operation='count', group_by_id=cls._field('name').id,
+            )
+            | cls._create_block(
+                name="Partner List", type='list', table_limit=3, list_sort_field_id=latitude.id,
+                tag_fields_ids=[(6, 0, (cls._field('name') | latitude).ids)],
+            )
+        )
+
+    def _get_block_data(self, workers):
+        self.env['ir.config_parameter'].sudo().set_param('dashboard.parallel_workers', workers)
+        block_data = self.env['dashboard.block']._prepare_block_data(self.blocks)
+        return {block_id: (vals['data'], vals['error']) for block_id, vals in block_data.items()}
+
+    def test_parallel_matches_sequential(self):
+        sequential = self._get_block_data(0)
+
+        # Worker cursors share the test transaction, serialized by the registry
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        Block = type(self.env['dashboard.block'])
+        with patch.object(Block, '_evaluate_blocks_parallel', autospec=True,
+                          side_effect=Block._evaluate_blocks_parallel) as evaluate_parallel:
+            parallel = self._get_block_data(4)
+        evaluate_parallel.assert_called_once()
+
+        for block in self.blocks:
+            with self.subTest(block=block.name):
+                self.assertFalse(parallel[block.id][1], parallel[block.id][1])
+                self.assertEqual(parallel[block.id], sequential[block.id])
+
+    def test_pool_size_change_keeps_shared_pool(self):
+        executor = get_executor()
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        sequential = self._get_block_data(0)
+        for pool_size in (2, 3):
+            self.env['ir.config_parameter'].sudo().set_param('dashboard.parallel_pool_size', pool_size)
+            self.assertEqual(self._get_block_data(4), sequential)
+        # Requests of other threads may still be submitting to it
+        self.assertIs(get_executor(), executor)
+        executor.submit(int).result()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import TEST_REF, ShellDashboardCase
+
+OPERATIONS = ('count', 'sum', 'avg', 'min', 'max')
+
+
+@tagged('post_install', '-at_install')
+class TestBlockQuery(ShellDashboardCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        latitude = cls._field('partner_latitude')
+        cls.charts = {
+            operation: cls._create_block(
+                name=f"Latitude {operation}", type='graph', operation=operation,
+                measured_field_id=latitude.id, group_by_id=cls._field('function').id,
+            )
+            for operation in OPERATIONS
+        }
+        cls.tiles = {
+            operation: cls._create_block(
+                name=f"Latitude {operation}", type='tile', operation=operation,
+                measured_field_id=latitude.id,
+            )
+            for operation in OPERATIONS
+        }
+
+    def test_fused_charts_match_single_charts(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        charts = Block.browse([chart.id for chart in self.charts.values()])
+        fused = charts._get_fused_chart_data()
+        for operation, chart in self.charts.items():
+            with self.subTest(operation=operation):
+                self.assertIn(chart.id, fused)
+                single = Block._get_chart_data(chart, model, Block._get_block_domain(chart))
+                self.assertEqual(self._chart_values(fused[chart.id]), self._chart_values(single))
+
+    def test_fused_tiles_match_single_tiles(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        tiles = Block.browse([tile.id for tile in self.tiles.values()])
+        fused = tiles._get_fused_values()
+        for operation, tile in self.tiles.items():
+            with self.subTest(operation=operation):
+                self.assertIn(tile, fused)
+                self.assertAlmostEqual(float(fused[tile]), float(Block._compute_block_value(tile, model)))
+
+    def test_fused_blocks_with_archived_records(self):
+        """Blocks with different domains read the same records fused or not"""
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        self.partners.filtered(lambda p: p.name == 'Beta 1').action_archive()
+        latitude = self._field('partner_latitude')
+        filters = {
+            'active': self.domain,
+            'beta': f"[('ref', '=', '{TEST_REF}'), ('function', '=', 'Beta')]",
+            'archived': f"[('ref', '=', '{TEST_REF}'), ('active', '=', False)]",
+        }
+        tiles = Block.browse([
+            self._create_block(name=f"{name} {operation}", type='tile', operation=operation,
+                               measured_field_id=latitude.id, filter=domain).id
+            for name, domain in filters.items()
+            for operation in ('count', 'sum')
+        ])
+        charts = Block.browse([
+            self._create_block(name=f"{name} chart", type='graph', operation='count',
+                               group_by_id=self._field('function').id, filter=domain).id
+            for name, domain in filters.items()
+        ])
+
+        fused = tiles._get_fused_values()
+        for tile in tiles:
+            with self.subTest(tile=tile.name):
+                self.assertIn(tile, fused)
+                self.assertAlmostEqual(float(fused[tile]), float(Block._compute_block_value(tile, model)))
+        self.assertEqual(
+            [float(fused[tile]) for tile in tiles],
+            [4.0, -0.5, 1.0, -2.0, 1.0, 4.0],
+        )
+
+        fused_charts = charts._get_fused_chart_data()
+        for chart in charts:
+            with self.subTest(chart=chart.name):
+                self.assertIn(chart.id, fused_charts)
+                single = Block._get_chart_data(chart, model, Block._get_block_domain(chart))
+                self.assertEqual(self._chart_values(fused_charts[chart.id]), self._chart_values(single))
+        self.assertEqual(self._chart_values(fused_charts[charts[2].id]), {'Beta': 1.0})
+
+    def test_count_counts_records(self):
+        """Count includes the records whose measured field is NULL"""
+        Block = self.env['dashboard.block']
+        chart = self.charts['count']
+        single = Block._get_chart_data(chart, self.env['res.partner'], Block._get_block_domain(chart))
+        self.assertEqual(self._chart_values(single), {'Alpha': 2.0, 'Beta': 2.0, 'Gamma': 1.0})
+        self.assertEqual(Block._compute_block_value(self.tiles['count'], self.env['res.partner']), 5)
+
+    def test_min_max_without_fusion(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        expected = {
+            'min': {'Alpha': 1.5, 'Beta': -2.0, 'Gamma': 0.0},
+            'max': {'Alpha': 1.5, 'Beta': 4.0, 'Gamma': 0.0},
+        }
+        for operation, values in expected.items():
+            with self.subTest(operation=operation):
+                chart = self.charts[operation]
+                data = Block._get_chart_data(chart, model, Block._get_block_domain(chart))
+                self.assertEqual(self._chart_values(data), values)
+
+    def test_query_over_cost_budget_is_refused(self):
+        Block = self.env['dashboard.block']
+        tile = self.tiles['count']
+        tile._compute_record_value()
+        self.assertEqual(tile.record_value, 5)
+
+        self.env['ir.config_parameter'].sudo().set_param('dashboard.max_query_cost', 0.001)
+        chart = self.charts['sum']
+        data = Block._get_chart_data(chart, self.env['res.partner'], Block._get_block_domain(chart))
+        self.assertTrue(data.get('degraded'))
+        self.assertIn("Query refused", data['error'])
+
+        # Refused tiles keep their last good value
+        tile._compute_record_value()
+        self.assertEqual(tile.record_value, 5)
+        self.assertTrue(tile.value_stale)
+
+    def test_approximate_count(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        domain = Block._parse_domain(self.domain)
+        # Below dashboard.approx_count_min_rows the count stays exact
+        for method in ('estimate', 'sample'):
+            with self.subTest(method=method):
+                self.assertEqual(Block._approximate_count(model, domain, method), 5)
+
+        self.env['ir.config_parameter'].sudo().set_param('dashboard.approx_count_min_rows', 0)
+        estimate = Block._approximate_count(model, domain, 'estimate')
+        self.assertIsInstance(estimate, int)
+        self.assertGreaterEqual(estimate, 0)
+
+        tile = self._create_block(name="Approximate Partners", type='tile', operation='count', count_mode='estimate')
+        tile._compute_record_value()
+        data = Block._get_tile_data(tile, model, domain, series=[])
+        self.assertTrue(data['approximate'])
+        self.assertTrue(data['formatted_value'].startswith("≈"))
+
+    def test_date_buckets_across_dst_change(self):
+        """Empty days are filled with 0, datetimes are bucketed in the user timezone"""
+        Block = self.env['dashboard.block'].with_context(tz='Europe/Brussels')
+        # Brussels moves from UTC+1 to UTC+2 on 2024-03-31
+        create_dates = {
+            'Alpha 1': '2024-03-29 22:30:00',  # 2024-03-29 23:30 local
+            'Beta 1': '2024-03-30 23:30:00',   # 2024-03-31 00:30 local
+            'Gamma 1': '2024-03-31 22:30:00',  # 2024-04-01 00:30 local
+        }
+        for partner in self.partners:
+            if partner.name in create_dates:
+                self.env.cr.execute(
+                    "UPDATE res_partner SET create_date = %s WHERE id = %s",
+                    (create_dates[partner.name], partner.id),
+                )
+        self.env.invalidate_all()
+
+        chart = self._create_block(
+            name="Partners per Day", type='graph', operation='count',
+            group_by_id=self._field('create_date').id, date_bucket='day',
+        )
+        data = Block._get_chart_data(
+            chart, self.env['res.partner'], Block._get_block_domain(chart), '2024-03-29', '2024-04-02'
+        )
+        self.assertEqual(data['labels'], ['2024-03-29', '2024-03-30', '2024-03-31', '2024-04-01', '2024-04-02'])
+        self.assertEqual([float(value) for value in data['datasets'][0]['data']], [1.0, 0.0, 1.0, 1.0, 0.0])
+
+    def test_top_n_others(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        cases = [
+            # Latitude sums: Alpha 1.5, Beta 2.0, Gamma 0
+            ('sum', 1, ['Beta', 'Others'], [2.0, 1.5]),
+            # Others averages the remaining values (4.0 and -2.0), not the group averages
+            ('avg', 1, ['Alpha', 'Others'], [1.5, 1.0]),
+            ('count', 2, None, None),
+        ]
+        for operation, top_n, labels, values in cases:
+            with self.subTest(operation=operation):
+                chart = self._create_block(
+                    name=f"Top {top_n} {operation}", type='graph', operation=operation, top_n=top_n,
+                    measured_field_id=self._field('partner_latitude').id, group_by_id=self._field('function').id,
+                )
+                data = Block._get_chart_data(chart, model, Block._get_block_domain(chart))
+                self.assertFalse(data.get('error'), data.get('error'))
+                dataset = data['datasets'][0]
+                self.assertEqual(len(data['labels']), top_n + 1)
+                self.assertEqual(data['labels'][-1], 'Others')
+                self.assertEqual(dataset['backgroundColor'][-1], 'hsl(0, 0%, 75%)')
+                if labels:
+                    self.assertEqual(data['labels'], labels)
+                    self.assertEqual([float(value) for value in dataset['data']], values)
+                else:
+                    # Whatever the tie order of Alpha and Beta, Others holds the rest
+                    self.assertEqual(float(dataset['data'][-1]), 1.0)
+                    self.assertEqual(sum(float(value) for value in dataset['data']), 5.0)
+
+    def test_chart_plan_follows_config_edits(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        chart = self._create_block(
+            name="Edited chart", type='graph', operation='count', group_by_id=self._field('function').id,
+        )
+        self.assertEqual(
+            self._chart_values(Block._get_chart_data(chart, model, Block._get_block_domain(chart))),
+            {'Alpha': 2.0, 'Beta': 2.0, 'Gamma': 1.0},
+        )
+        # Same transaction, so the same write_date
+        chart.write({'operation': 'sum', 'measured_field_id': self._field('partner_latitude').id})
+        self.assertEqual(
+            self._chart_values(Block._get_chart_data(chart, model, Block._get_block_domain(chart))),
+            {'Alpha': 1.5, 'Beta': 2.0, 'Gamma': 0.0},
+        )
+
+    def test_failing_chart_query_keeps_transaction(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        chart = self.charts['sum']
+        chart.statement_timeout = 0
+        self.env['ir.config_parameter'].sudo().set_param('dashboard.statement_timeout', 0)
+        expected = self._chart_values(Block._get_chart_data(chart, model, Block._get_block_domain(chart)))
+
+        def fail(cr, *args, **kwargs):
+            cr.execute("SELECT 1 / 0")
+
+        with patch.object(type(Block), '_check_query_cost', side_effect=fail):
+            data = Block._get_chart_data(chart, model, Block._get_block_domain(chart))
+        self.assertIn("division by zero", data['error'])
+
+        # The transaction is still usable and the plan is prepared again
+        plan, _params, _bucket = Block._get_chart_plan(chart, model, Block._get_block_domain(chart))
+        self.env.cr.execute("SELECT count(*) FROM pg_prepared_statements WHERE name = %s", (plan.name,))
+        self.assertEqual(self.env.cr.fetchone()[0], 0)
+        self.assertEqual(
+            self._chart_values(Block._get_chart_data(chart, model, Block._get_block_domain(chart))), expected,
+        )
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TEST_REF, ShellDashboardCase
+
+BROKEN_FILTER = "[('shell_dashboard_no_such_field', '=', 1)]"
+
+
+@tagged('post_install', '-at_install')
+class TestBlockRefresh(ShellDashboardCase):
+
+    def test_broken_filter_keeps_previous_value(self):
+        tile = self._create_block(name="Partners", type='tile', operation='count')
+        tile._compute_record_value()
+        self.assertEqual(tile.record_value, 5)
+        self.assertFalse(tile.value_stale)
+
+        tile.filter = BROKEN_FILTER
+        tile._compute_record_value()
+        self.assertEqual(tile.record_value, 5)
+        self.assertTrue(tile.value_stale)
+
+    def test_failing_block_does_not_hold_the_queue(self):
+        Block = self.env['dashboard.block']
+        due = fields.Datetime.now() - timedelta(hours=1)
+        # Same due time: the cron takes the broken block first, by id
+        broken, healthy = [
+            self._create_block(name=name, type='tile', operation='count', refresh_interval=60)
+            for name in ("Broken", "Healthy")
+        ]
+        (broken | healthy).write({'next_refresh': due, 'record_value': 3})
+        original = type(Block)._get_record_value
+
+        def get_record_value(self, rec, fused_values, previous_values):
+            if rec == broken:
+                raise RuntimeError("Broken block")
+            return original(self, rec, fused_values, previous_values)
+
+        with patch.object(type(Block), '_get_record_value', autospec=True, side_effect=get_record_value):
+            Block._cron_refresh_values(batch_size=10)
+
+        self.assertEqual(healthy.record_value, 5)
+        self.assertFalse(healthy.value_stale)
+        self.assertGreater(healthy.next_refresh, fields.Datetime.now())
+        self.assertEqual(broken.record_value, 3)
+        self.assertTrue(broken.value_stale)
+        self.assertGreater(broken.next_refresh, fields.Datetime.now())
+
+    def test_refresh_keeps_write_date(self):
+        tile = self._create_block(name="Partners", type='tile', operation='count')
+        tile.flush_recordset()
+        self.env.cr.execute("UPDATE dashboard_block SET write_date = '2020-01-01' WHERE id = %s", (tile.id,))
+        tile.invalidate_recordset()
+
+        tile._compute_record_value()
+        tile._schedule_next_refresh()
+        self.assertEqual(tile.record_value, 5)
+        self.assertEqual(tile.write_date, fields.Datetime.to_datetime('2020-01-01'))
+
+    def test_manual_refresh_is_queued(self):
+        tile = self._create_block(name="Partners", type='tile', operation='count')
+        tile._compute_record_value()
+        self.env['res.partner'].create({'name': 'Delta 1', 'ref': TEST_REF})
+
+        tile.action_refresh_data()
+        self.assertEqual(tile.record_value, 5)
+        self.assertLessEqual(tile.next_refresh, fields.Datetime.now())
+
+        self.env['dashboard.block']._cron_refresh_values()
+        self.assertEqual(tile.record_value, 6)
+        self.assertFalse(tile.next_refresh)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+import time
+
+from odoo.tests import tagged
+
+from odoo.addons.shell_dashboard.models import shell_replica
+from .common import ShellDashboardCase
+
+# TEST-NET-1 address: never routed, connecting only ends with the timeout
+UNREACHABLE_DSN = 'postgresql://shell_dashboard@192.0.2.1:5432/shell_dashboard_replica'
+
+
+@tagged('post_install', '-at_install')
+class TestBlockReplica(ShellDashboardCase):
+
+    def setUp(self):
+        super().setUp()
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('dashboard.replica_dsn', UNREACHABLE_DSN)
+        params.set_param('dashboard.replica_connect_timeout', 1)
+        self.dsn = shell_replica.get_replica_dsn(self.env)
+        shell_replica._replica_health.pop(self.dsn, None)
+        self.addCleanup(shell_replica._replica_health.pop, self.dsn, None)
+
+    def test_connect_timeout_in_dsn(self):
+        self.assertEqual(self.dsn, UNREACHABLE_DSN + '?connect_timeout=1')
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        Block = self.env['dashboard.block']
+        model = self.env['res.partner']
+        tile = self._create_block(name="Partners", type='tile', operation='count')
+        chart = self._create_block(
+            name="Partners by Job", type='graph', operation='count', group_by_id=self._field('function').id,
+        )
+
+        started = time.monotonic()
+        self.assertEqual(Block._compute_block_value(tile, model), 5)
+        # Given up after the connect timeout, not the OS TCP timeout
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertFalse(shell_replica._replica_health[self.dsn][1])
+
+        # The failed health check is cached: the next queries go straight to the primary
+        with patch.object(shell_replica, '_check_replica') as check_replica:
+            data = Block._get_chart_data(chart, model, Block._get_block_domain(chart))
+        check_replica.assert_not_called()
+        self.assertEqual(self._chart_values(data), {'Alpha': 2.0, 'Beta': 2.0, 'Gamma': 1.0})
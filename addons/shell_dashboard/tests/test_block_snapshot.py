@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from odoo.tests import tagged
+
+from .common import TEST_REF, ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockSnapshot(ShellDashboardCase):
+
+    def _snapshots(self, block, period):
+        return {
+            snapshot.date: snapshot.value
+            for snapshot in self.env['dashboard.block.snapshot'].search([
+                ('block_id', '=', block.id), ('period', '=', period),
+            ])
+        }
+
+    def test_unscheduled_tile_computed_at_snapshot(self):
+        Snapshot = self.env['dashboard.block.snapshot']
+        tile = self._create_block(type='tile', operation='count', trend_period='day')
+        tile._compute_record_value()
+        self.assertEqual(tile.record_value, 5)
+
+        self.env['res.partner'].create({'name': 'Delta 1', 'ref': TEST_REF})
+        Snapshot._cron_take_snapshots()
+        self.assertEqual(list(self._snapshots(tile, 'day').values()), [6])
+
+    def test_month_rolled_up_over_consecutive_days(self):
+        Snapshot = self.env['dashboard.block.snapshot']
+        tile = self._create_block(type='tile', trend_period='day')
+        Snapshot.create([
+            {'block_id': tile.id, 'period': 'day', 'date': date(2025, 1, 30), 'value': 1},
+            {'block_id': tile.id, 'period': 'day', 'date': date(2025, 1, 31), 'value': 2},
+        ])
+        # The default 90 days limit passes January 30th, then January 31st
+        first_run = date(2025, 1, 31) + timedelta(days=90)
+        Snapshot._compact_snapshots(first_run)
+        Snapshot.invalidate_model()
+        self.assertEqual(self._snapshots(tile, 'month'), {date(2025, 1, 1): 1})
+
+        Snapshot._compact_snapshots(first_run + timedelta(days=1))
+        Snapshot.invalidate_model()
+        self.assertEqual(self._snapshots(tile, 'month'), {date(2025, 1, 1): 2})
+        self.assertFalse(self._snapshots(tile, 'day'))
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from odoo.addons.shell_dashboard.models.shell_block_stat import pop_samples
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestBlockStat(ShellDashboardCase):
+
+    def _stat_count(self, block):
+        return self.env['dashboard.block.stat'].sudo().search_count([('block_id', '=', block.id)])
+
+    def test_dashboard_reads_do_not_write(self):
+        Block = self.env['dashboard.block']
+        tile = self._create_block(type='tile', operation='count', cache_ttl=600)
+        pop_samples(self.env.cr.dbname)
+
+        for _read in range(3):
+            Block.get_blocks_data(tile.ids)
+        self.assertEqual(self._stat_count(tile), 0)
+
+        # Value computes store their samples, with the ones kept in memory
+        tile._compute_record_value()
+        self.assertGreaterEqual(self._stat_count(tile), 2)
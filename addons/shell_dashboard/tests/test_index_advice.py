@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestIndexAdvice(ShellDashboardCase):
+
+    def _create_advice(self, **vals):
+        Advice = self.env['dashboard.index.advice']
+        table, columns, predicate = 'res_partner', ['function'], [('active', 'true')]
+        advice_vals = Advice._prepare_advice(
+            table, columns, 'partial', predicate, 1000.0, {'Total Cost': 10.0}, benefit=5.0, reason="Test",
+        )
+        advice_vals.update(block_id=self._create_block(type='tile').id, **vals)
+        return Advice.create(advice_vals)
+
+    def _mogrify(self, query):
+        return self.env.cr.mogrify(*query).decode()
+
+    def test_index_sql_rebuilt_from_fields(self):
+        advice = self._create_advice(definition="DROP TABLE res_partner")
+        create_sql, drop_sql = advice._get_index_sql()
+        self.assertEqual(
+            self._mogrify(create_sql),
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "res_partner_dash_function_where_active_idx" '
+            'ON "res_partner" USING btree ("function") WHERE "active" = true',
+        )
+        self.assertEqual(
+            self._mogrify(drop_sql),
+            'DROP INDEX CONCURRENTLY IF EXISTS "res_partner_dash_function_where_active_idx"',
+        )
+
+    def test_tampered_advice_refused(self):
+        for vals in (
+            {'index_name': 'res_partner_pkey'},
+            {'index_name': 'x"; DROP TABLE res_partner; --'},
+            {'table_name': 'res_partner"; DROP TABLE res_partner; --'},
+            {'column_names': 'function, no_such_column'},
+            {'predicate': '"active" = true; DROP TABLE res_partner'},
+            {'index_type': 'brin'},
+        ):
+            with self.subTest(vals=vals), self.assertRaises(UserError):
+                self._create_advice(**vals)._get_index_sql()
+
+    def test_create_refused_without_ddl(self):
+        advice = self._create_advice(index_name='res_partner_pkey')
+        advice.action_create_index()
+        self.assertEqual(advice.state, 'failed')
+        self.assertIn('Invalid index name', advice.error)
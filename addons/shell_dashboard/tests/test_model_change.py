@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from odoo.addons.shell_dashboard.models import shell_model_change
+
+from .common import ShellDashboardCase
+
+
+@tagged('post_install', '-at_install')
+class TestModelChange(ShellDashboardCase):
+
+    def setUp(self):
+        super().setUp()
+        self.Change = self.env['dashboard.model.change'].sudo()
+        self.env['ir.config_parameter'].sudo().set_param('dashboard.notify_interval', 60)
+        patcher = patch.dict(shell_model_change._last_notified, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(shell_model_change._job_triggered_until, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _commit_changes(self, *model_names):
+        """Run the pre-commit hook as a transaction writing ``model_names`` would"""
+        self.env.cr.precommit.data['shell_dashboard.changed_models'] = set(model_names)
+        self.Change._flush_changes()
+
+    def test_versions_survive_fold(self):
+        before = self.Change._get_versions(['res.partner'])['res.partner']
+        with patch.object(type(self.env['dashboard.block']), '_notify_changed_models'):
+            self._commit_changes('res.partner')
+            self._commit_changes('res.partner')
+        self.assertEqual(self.Change._get_versions(['res.partner'])['res.partner'], before + 2)
+
+        with patch.object(type(self.env['dashboard.block']), '_notify_changed_models') as notify:
+            self.Change._cron_fold_changes()
+        self.assertIn('res.partner', notify.call_args.args[0])
+        self.assertEqual(self.Change._get_versions(['res.partner'])['res.partner'], before + 2)
+        self.assertEqual(self.Change.search_count([('model_name', '=', 'res.partner')]), 1)
+
+    def test_notifications_rate_limited(self):
+        cron = self.env.ref('shell_dashboard.ir_cron_dashboard_model_change')
+        with patch.object(type(self.env['dashboard.block']), '_notify_changed_models') as notify, \
+                patch.object(type(cron), '_trigger') as trigger:
+            self._commit_changes('res.partner')
+            self._commit_changes('res.partner')
+            self._commit_changes('res.partner', 'res.country')
+        # The second partner change waits for the change job, triggered once
+        self.assertEqual([call.args[0] for call in notify.call_args_list], [{'res.partner'}, {'res.country'}])
+        trigger.assert_called_once()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+{
+    'name': 'Shell Dashboard Benchmark',
+    'summary': 'Data-volume benchmark of Shell Dashboard block evaluation',
+
+    'description': """
+Model sintetis dan test suite untuk mengukur performa evaluasi blok
+Shell Dashboard pada volume data besar (10k sampai 10M baris).
+
+Test ditandai dengan tag 'shell_dashboard_benchmark' dan tidak ikut
+dijalankan pada test standar.
+    """,
+
+    'author': 'Fahmi Nur Fadillah (TechnoZee)',
+    'website': 'https://techno-zee.my.id',
+
+    'category': 'Dashboard',
+    'version': '1.0',
+
+    'depends': [
+        'shell_dashboard',
+    ],
+
+    'data': [
+        'security/ir.model.access.csv',
+    ],
+
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+}
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+STATES = [('draft', 'Draft'), ('confirmed', 'Confirmed'), ('done', 'Done'), ('cancel', 'Cancelled')]
+
+
+class ShellDashboardBenchmarkCategory(models.Model):
+    """Many2one target of the benchmark records, its size is the cardinality"""
+    _name = "shell.dashboard.benchmark.category"
+    _description = "Shell Dashboard Benchmark Category"
+
+    name = fields.Char(required=True)
+
+
+class ShellDashboardBenchmarkRecord(models.Model):
+    """Synthetic source model of the dashboard benchmark"""
+    _name = "shell.dashboard.benchmark.record"
+    _description = "Shell Dashboard Benchmark Record"
+
+    name = fields.Char(required=True)
+    category_id = fields.Many2one('shell.dashboard.benchmark.category', string="Category", index=True)
+    state = fields.Selection(STATES, string="Status", default='draft')
+    amount = fields.Float(string="Amount")
+    quantity = fields.Integer(string="Quantity")
+    date = fields.Date(string="Date")
+    active = fields.Boolean(default=True)
+
+    # ==== DATA GENERATION ====
+    @api.model
+    def _seed(self, rows, categories=100, days=730):
+        """Replace the benchmark data by ``rows`` records in ``categories`` categories
+
+        Rows are generated in SQL so 10M records take minutes, not hours.
+        Dates and create dates are spread over the last ``days`` days.
+        """
+        started = time.monotonic()
+        cr = self.env.cr
+        cr.execute("DELETE FROM shell_dashboard_benchmark_record")
+        cr.execute("DELETE FROM shell_dashboard_benchmark_category")
+        cr.execute("""
+            INSERT INTO shell_dashboard_benchmark_category (name, create_uid, create_date, write_uid, write_date)
+            SELECT 'Category ' || g, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM generate_series(1, %(categories)s) g
+        """, {'uid': self.env.uid, 'categories': categories})
+        cr.execute("SELECT min(id) FROM shell_dashboard_benchmark_category")
+        first_category = cr.fetchone()[0]
+        cr.execute("""
+            INSERT INTO shell_dashboard_benchmark_record
+                (name, category_id, state, amount, quantity, date, active,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT 'Record ' || g,
+                   %(first_category)s + mod(hashint, %(categories)s),
+                   (ARRAY['draft', 'confirmed', 'done', 'cancel'])[1 + mod(hashint, 4)],
+                   mod(hashint, 100000) / 100.0,
+                   mod(hashint, 50),
+                   (now() at time zone 'UTC')::date - mod(g, %(days)s),
+                   mod(g, 20) <> 0,
+                   %(uid)s,
+                   (now() at time zone 'UTC') - mod(g, %(days)s) * interval '1 day' - mod(g, 86400) * interval '1 second',
+                   %(uid)s,
+                   now() at time zone 'UTC'
+              FROM (
+                SELECT g, abs(hashint4(g)::bigint) AS hashint FROM generate_series(1, %(rows)s) g
+              ) series
+        """, {
+            'uid': self.env.uid, 'rows': rows, 'categories': categories,
+            'first_category': first_category, 'days': days,
+        })
+        cr.execute("ANALYZE shell_dashboard_benchmark_category")
+        cr.execute("ANALYZE shell_dashboard_benchmark_record")
+        self.env.invalidate_all()
+        _logger.info("Seeded %s benchmark records in %s categories in %.1fs",
+                     rows, categories, time.monotonic() - started)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Data-volume benchmark of dashboard block evaluation
+
+Run on a local PostgreSQL with::
+
+    odoo -d bench -i shell_dashboard_benchmark --test-tags shell_dashboard_benchmark --stop-after-init
+
+Environment variables:
+
+* ``SHELL_DASHBOARD_BENCH_ROWS``: comma separated row counts (default ``10000``)
+* ``SHELL_DASHBOARD_BENCH_CATEGORIES``: many2one cardinality (default ``100``)
+* ``SHELL_DASHBOARD_BENCH_REPEAT``: runs per measure, the median is kept (default ``3``)
+* ``SHELL_DASHBOARD_BENCH_OUTPUT``: result file (default ``shell_dashboard_benchmark.json``)
+* ``SHELL_DASHBOARD_BENCH_THRESHOLDS``: threshold file (default ``benchmark_thresholds.json``
+  next to this file)
+"""
+from odoo.addons.shell_dashboard.models.shell_block_stat import measure
+from odoo.addons.shell_dashboard.models.shell_cache import get_block_cache
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import json_default
+import gzip
+import json
+import logging
+import os
+import platform
+import statistics
+
+_logger = logging.getLogger(__name__)
+
+MODEL = 'shell.dashboard.benchmark.record'
+
+
+@tagged('post_install', '-at_install', '-standard', 'shell_dashboard_benchmark')
+class TestBlockBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.row_counts = [
+            int(rows) for rows in os.environ.get('SHELL_DASHBOARD_BENCH_ROWS', '10000').split(',') if rows.strip()
+        ]
+        cls.categories = int(os.environ.get('SHELL_DASHBOARD_BENCH_CATEGORIES', 100))
+        cls.repeat = max(int(os.environ.get('SHELL_DASHBOARD_BENCH_REPEAT', 3)), 1)
+        cls.output = os.environ.get('SHELL_DASHBOARD_BENCH_OUTPUT', 'shell_dashboard_benchmark.json')
+        cls.thresholds_file = os.environ.get(
+            'SHELL_DASHBOARD_BENCH_THRESHOLDS',
+            os.path.join(os.path.dirname(__file__), 'benchmark_thresholds.json'),
+        )
+
+        cls.action = cls.env['ir.actions.client'].create({
+            'name': 'Benchmark Dashboard',
+            'tag': 'shell_dashboard.action',
+        })
+        model = cls.env['ir.model']._get(MODEL)
+        field = lambda name: cls.env['ir.model.fields']._get(MODEL, name)
+        common = {
+            'model_id': model.id,
+            'client_action_id': cls.action.id,
+            # Measure evaluation, not the result cache
+            'cache_ttl': 0,
+        }
+        Block = cls.env['dashboard.block']
+        cls.tile = Block.create(dict(common, name="Records", type='tile', operation='count'))
+        cls.kpi = Block.create(dict(
+            common, name="Done Amount", type='kpi', operation='sum',
+            measured_field_id=field('amount').id, filter="[('state', '=', 'done')]",
+        ))
+        cls.chart_many2one = Block.create(dict(
+            common, name="Amount by Category", type='graph', graph_type='bar', operation='sum',
+            measured_field_id=field('amount').id, group_by_id=field('category_id').id,
+        ))
+        cls.chart_selection = Block.create(dict(
+            common, name="Records by Status", type='graph', graph_type='pie', operation='count',
+            measured_field_id=field('amount').id, group_by_id=field('state').id,
+        ))
+        cls.chart_date = Block.create(dict(
+            common, name="Amount by Month", type='graph', graph_type='line', operation='sum',
+            measured_field_id=field('amount').id, group_by_id=field('date').id, date_bucket='month',
+        ))
+        cls.table = Block.create(dict(
+            common, name="Latest Records", type='list', table_limit=20,
+            tag_fields_ids=[(6, 0, (field('name') | field('state') | field('amount') | field('date')).ids)],
+        ))
+        cls.value_blocks = cls.tile | cls.kpi
+
+    def _measure(self, func):
+        """Median wall time, SQL time and query count of ``func`` over the runs"""
+        samples = []
+        for _run in range(self.repeat):
+            self.env.invalidate_all()
+            with measure() as sample:
+                func()
+            samples.append(sample)
+        return {
+            'median_ms': round(statistics.median(s['wall_time'] for s in samples), 2),
+            'max_ms': round(max(s['wall_time'] for s in samples), 2),
+            'sql_ms': round(statistics.median(s['sql_time'] for s in samples), 2),
+            'queries': int(statistics.median(s['query_count'] for s in samples)),
+        }
+
+    def _run_benchmarks(self):
+        Block = self.env['dashboard.block']
+        cache = get_block_cache(self.env.cr.dbname)
+        chart_model = self.env[MODEL]
+
+        def dashboard_cold():
+            cache.clear()
+            Block.get_dashboard_vals(self.action.id)
+
+        def chart(block):
+            return lambda: Block._get_chart_data(block, chart_model, Block._get_block_domain(block))
+
+        metrics = {
+            'get_dashboard_vals': dashboard_cold,
+            'chart_many2one': chart(self.chart_many2one),
+            'chart_selection': chart(self.chart_selection),
+            'chart_date': chart(self.chart_date),
+            'compute_record_value': lambda: self.value_blocks._compute_record_value(),
+        }
+        results = {name: self._measure(func) for name, func in metrics.items()}
+
+        # Second dashboard load served by the block cache
+        (self.value_blocks | self.chart_many2one | self.chart_selection | self.chart_date | self.table).write(
+            {'cache_ttl': 600}
+        )
+        Block.get_dashboard_vals(self.action.id)
+        results['get_dashboard_vals_cached'] = self._measure(
+            lambda: Block.get_dashboard_vals(self.action.id)
+        )
+        (self.value_blocks | self.chart_many2one | self.chart_selection | self.chart_date | self.table).write(
+            {'cache_ttl': 0}
+        )
+        return results
+
+    def _measure_payload(self):
+        """Size in bytes of the dashboard block data, verbose and compact, raw and gzipped"""
+        Block = self.env['dashboard.block']
+        block_ids = Block._get_dashboard_blocks(self.action.id).ids
+
+        def size(data):
+            body = json.dumps(data, default=json_default, separators=(',', ':')).encode('utf-8')
+            return len(body), len(gzip.compress(body, compresslevel=6))
+
+        verbose, verbose_gzip = size(Block.get_blocks_data(block_ids))
+        compact, compact_gzip = size(Block.get_blocks_data(block_ids, compact=True))
+        return {
+            'verbose_bytes': verbose,
+            'verbose_gzip_bytes': verbose_gzip,
+            'compact_bytes': compact,
+            'compact_gzip_bytes': compact_gzip,
+            # Compact vs verbose, compared at the same encoding
+            'raw_reduction_pct': round(100.0 * (1 - compact / verbose), 1) if verbose else 0.0,
+            'gzip_reduction_pct': round(100.0 * (1 - compact_gzip / verbose_gzip), 1) if verbose_gzip else 0.0,
+        }
+
+    def _check_thresholds(self, report, thresholds):
+        failures = []
+        for entry in report['results']:
+            limits = thresholds.get(str(entry['rows']), {}).get(entry['metric'])
+            if not limits:
+                continue
+            if 'max_ms' in limits and entry['median_ms'] > limits['max_ms']:
+                failures.append(
+                    f"{entry['metric']} @ {entry['rows']} rows: {entry['median_ms']} ms > {limits['max_ms']} ms"
+                )
+            if 'max_queries' in limits and entry['queries'] > limits['max_queries']:
+                failures.append(
+                    f"{entry['metric']} @ {entry['rows']} rows: {entry['queries']} queries > {limits['max_queries']}"
+                )
+        return failures
+
+    def test_block_evaluation_benchmark(self):
+        self.env.cr.execute("SHOW server_version")
+        report = {
+            'postgresql': self.env.cr.fetchone()[0],
+            'python': platform.python_version(),
+            'categories': self.categories,
+            'repeat': self.repeat,
+            'results': [],
+            'payload': [],
+        }
+        for rows in self.row_counts:
+            self.env[MODEL]._seed(rows, self.categories)
+            for metric, result in self._run_benchmarks().items():
+                entry = dict(result, rows=rows, metric=metric)
+                report['results'].append(entry)
+                _logger.info("Benchmark %s @ %s rows: %s", metric, rows, result)
+            payload = dict(self._measure_payload(), rows=rows)
+            report['payload'].append(payload)
+            _logger.info("Dashboard payload @ %s rows: %s", rows, payload)
+
+        thresholds = {}
+        if os.path.exists(self.thresholds_file):
+            with open(self.thresholds_file) as thresholds_file:
+                thresholds = json.load(thresholds_file)
+        report['failures'] = self._check_thresholds(report, thresholds)
+
+        with open(self.output, 'w') as output:
+            json.dump(report, output, indent=2, default=json_default)
+        _logger.info("Dashboard benchmark written to %s", os.path.abspath(self.output))
+
+        self.assertFalse(report['failures'], "Dashboard performance regressions:\n" + "\n".join(report['failures']))